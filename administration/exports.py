@@ -0,0 +1,125 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from finances.models import Deposit, Withdrawal
+from game.models import Game
+from shared.helpers import get_day_window
+
+User = get_user_model()
+
+# Rows fetched from the database per round trip while exporting
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _filter_dates(queryset, field, date_from=None, date_to=None):
+    """
+    Keep the rows whose `field` falls between two days, inclusive, in the operator's timezone.
+    """
+    if date_from:
+        queryset = queryset.filter(**{f"{field}__gte": get_day_window(date_from)[0]})
+    if date_to:
+        queryset = queryset.filter(**{f"{field}__lt": get_day_window(date_to)[1]})
+    return queryset
+
+
+def export_users(date_from=None, date_to=None, status=None):
+    """
+    Users with their wallet, by date joined. `status` is "active" or "inactive".
+    """
+    queryset = _filter_dates(User.objects.users(), 'date_joined', date_from, date_to)
+    if status:
+        queryset = queryset.filter(is_active=status == "active")
+    return queryset.order_by('pk').values(
+        'id', 'username', 'email', 'phone_number', 'first_name', 'last_name', 'referral_code',
+        'is_active', 'date_joined', 'last_connection',
+        balance=F('wallet__balance'),
+        commission=F('wallet__commission'),
+        on_hold=F('wallet__on_hold'),
+        salary=F('wallet__salary'),
+        package=F('wallet__package__name'),
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def export_deposits(date_from=None, date_to=None, status=None):
+    """
+    Deposits with their user, by deposit date.
+    """
+    queryset = _filter_dates(Deposit.objects.all(), 'date_time', date_from, date_to)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.order_by('pk').values(
+        'id', 'user_id', 'amount', 'status', 'date_time', 'updated_at', 'screenshot',
+        username=F('user__username'),
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def export_withdrawals(date_from=None, date_to=None, status=None):
+    """
+    Withdrawals with their user and payment method, by request date.
+    """
+    queryset = _filter_dates(Withdrawal.objects.all(), 'created_at', date_from, date_to)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.order_by('pk').values(
+        'id', 'user_id', 'amount', 'status', 'transaction_reference', 'created_at', 'updated_at',
+        username=F('user__username'),
+        payment_method_name=F('payment_method__name'),
+        wallet_address=F('payment_method__wallet'),
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def export_games(date_from=None, date_to=None, status=None):
+    """
+    Games with their user and product names, by creation date.
+    `status` is "played", "pending" or "unplayed".
+    Games are read in primary key chunks, and the products of each chunk with one more query.
+    """
+    queryset = _filter_dates(Game.objects.all(), 'created_at', date_from, date_to)
+    if status == "played":
+        queryset = queryset.filter(played=True)
+    elif status == "pending":
+        queryset = queryset.filter(played=False, pending=True)
+    elif status == "unplayed":
+        queryset = queryset.filter(played=False, pending=False)
+    queryset = queryset.order_by('pk').values(
+        'id', 'user_id', 'rating_no', 'amount', 'commission', 'played', 'pending', 'special_product',
+        'game_number', 'rating_score', 'is_active', 'created_at', 'updated_at',
+        username=F('user__username'),
+    )
+
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_id)[:EXPORT_CHUNK_SIZE])
+        if not chunk:
+            return
+        products = defaultdict(list)
+        for game_id, name in Game.products.through.objects.filter(
+            game_id__in=[row['id'] for row in chunk]
+        ).values_list('game_id', 'product__name'):
+            products[game_id].append(name)
+        for row in chunk:
+            row['products'] = "; ".join(products[row['id']])
+            yield row
+        last_id = chunk[-1]['id']
+
+
+# Export name: (rows function, columns, allowed status values)
+EXPORTS = {
+    "users": (export_users, [
+        'id', 'username', 'email', 'phone_number', 'first_name', 'last_name', 'referral_code', 'is_active',
+        'date_joined', 'last_connection', 'balance', 'commission', 'on_hold', 'salary', 'package',
+    ], ["active", "inactive"]),
+    "deposits": (export_deposits, [
+        'id', 'user_id', 'username', 'amount', 'status', 'date_time', 'updated_at', 'screenshot',
+    ], [status for status, _ in Deposit.STATUS_CHOICES]),
+    "withdrawals": (export_withdrawals, [
+        'id', 'user_id', 'username', 'amount', 'status', 'transaction_reference', 'payment_method_name',
+        'wallet_address', 'created_at', 'updated_at',
+    ], [status for status, _ in Withdrawal.STATUS_CHOICES]),
+    "games": (export_games, [
+        'id', 'user_id', 'username', 'rating_no', 'products', 'amount', 'commission', 'played', 'pending',
+        'special_product', 'game_number', 'rating_score', 'is_active', 'created_at', 'updated_at',
+    ], ["played", "pending", "unplayed"]),
+}
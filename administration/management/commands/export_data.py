@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from administration.exports import EXPORTS
+from shared.helpers import STREAM_FORMATS, iter_lines
+
+
+class Command(BaseCommand):
+    help = "Write users, deposits, withdrawals or games as CSV or NDJSON, reading them in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=list(EXPORTS))
+        parser.add_argument("--format", choices=STREAM_FORMATS, default="csv")
+        parser.add_argument("--date-from", type=date.fromisoformat, help="First day to include (YYYY-MM-DD).")
+        parser.add_argument("--date-to", type=date.fromisoformat, help="Last day to include (YYYY-MM-DD).")
+        parser.add_argument("--status")
+        parser.add_argument("--output", help="File to write to, standard output by default.")
+
+    def handle(self, *args, **options):
+        rows, fields, statuses = EXPORTS[options["name"]]
+        if options["status"] and options["status"] not in statuses:
+            raise CommandError(f"Invalid status: {options['status']}. Allowed: {statuses}")
+
+        lines = iter_lines(
+            rows(date_from=options["date_from"], date_to=options["date_to"], status=options["status"]),
+            fields,
+            options["format"],
+        )
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        with open(options["output"], "w", newline="", encoding="utf-8") as target:
+            for line in lines:
+                target.write(line)
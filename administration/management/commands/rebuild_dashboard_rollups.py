@@ -0,0 +1,46 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from administration.models import DashboardRollup
+from game.models import Game
+from shared.helpers import get_operator_timezone
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the admin dashboard rollups from the users and games. "
+        "Logins are only known for each user's last connection, so past days keep at most that count."
+    )
+
+    def handle(self, *args, **kwargs):
+        tz = get_operator_timezone()
+        counters = defaultdict(lambda: {"registrations": 0, "submissions": 0, "logins": 0})
+
+        for row in User.objects.annotate(day=TruncDate('date_joined', tzinfo=tz)).values('day').annotate(
+            count=Count('id')
+        ).order_by():
+            counters[row['day']]["registrations"] = row['count']
+
+        for row in User.objects.users().filter(last_connection__isnull=False).annotate(
+            day=TruncDate('last_connection', tzinfo=tz)
+        ).values('day').annotate(count=Count('id')).order_by():
+            counters[row['day']]["logins"] = row['count']
+
+        for row in Game.objects.filter(Q(played=True) | Q(pending=True), is_active=True).annotate(
+            day=TruncDate('updated_at', tzinfo=tz)
+        ).values('day').annotate(count=Count('id')).order_by():
+            counters[row['day']]["submissions"] = row['count']
+
+        with transaction.atomic():
+            DashboardRollup.objects.all().delete()
+            DashboardRollup.objects.bulk_create(
+                [DashboardRollup(date=day, **values) for day, values in counters.items()],
+                batch_size=1000,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Dashboard rollups rebuilt for {len(counters)} days."))
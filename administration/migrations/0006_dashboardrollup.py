@@ -0,0 +1,26 @@
+# Generated by Django 3.2.21 on 2026-10-17 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0005_event_created_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('registrations', models.IntegerField(default=0)),
+                ('submissions', models.IntegerField(default=0)),
+                ('logins', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
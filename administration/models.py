@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils.timezone import localdate
 from cloudinary_storage.storage import MediaCloudinaryStorage
 from cloudinary.models import CloudinaryField
 import cloudinary
@@ -63,4 +65,70 @@ class Event(models.Model):
         return f"Event named {self.name}"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+
+
+class DashboardRollup(models.Model):
+    """
+    Per-day counters behind the admin dashboard, in the operator's timezone.
+    Updated as users register, log in for the first time in a day and submit games,
+    so the dashboard reads a year of rows instead of aggregating Users and Games.
+    `rebuild_dashboard_rollups` recomputes them from history.
+    """
+    date = models.DateField(unique=True)
+    registrations = models.IntegerField(default=0)
+    submissions = models.IntegerField(default=0)
+    logins = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"Dashboard rollup for {self.date}"
+
+    @classmethod
+    def record(cls, day=None, **deltas):
+        """
+        Add the given deltas to a day's counters, today by default.
+        The update runs after the surrounding transaction commits, so the
+        shared daily row is only locked for the duration of one statement.
+        """
+        from shared.helpers import get_today
+
+        day = day or get_today()
+
+        def apply():
+            changes = {field: F(field) + delta for field, delta in deltas.items()}
+            if cls.objects.filter(date=day).update(**changes):
+                return
+            try:
+                with transaction.atomic():
+                    cls.objects.create(date=day, **deltas)
+            except IntegrityError:
+                # Another request created the row first
+                cls.objects.filter(date=day).update(**changes)
+
+        transaction.on_commit(apply)
+
+    @classmethod
+    def record_game_submitted(cls, game):
+        """
+        Count a game being played. Call before clearing `game.pending`.
+        A game that was put on hold on an earlier day moves to today's count,
+        matching the dashboard's "played or pending, by last update" definition.
+        """
+        from shared.helpers import get_operator_timezone, get_today
+
+        if game.pending:
+            held_on = localdate(game.updated_at, timezone=get_operator_timezone())
+            if held_on == get_today():
+                return
+            cls.record(day=held_on, submissions=-1)
+        cls.record(submissions=1)
+
+    @classmethod
+    def get_year(cls, year):
+        """
+        Return the year's rows as a {date: rollup} dict, in one query.
+        """
+        return {rollup.date: rollup for rollup in cls.objects.filter(date__year=year)}
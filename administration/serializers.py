@@ -1,10 +1,9 @@
 from rest_framework import serializers
 from .models import Settings,Event
 from finances.models import Deposit
-from shared.helpers import get_settings
-from users.models import Invitation
+from finances.services import DepositReviewService
+from shared.helpers import STREAM_FORMATS, get_day_window
 # from users.serializers import UserPartialSerilzer
-from shared.helpers import create_user_notification
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -76,6 +75,30 @@ class DepositSerializer:
             fields = "__all__"
             ref_name = "Deposit - List"
 
+    class QueueFilter(serializers.Serializer):
+        """
+        Query parameters of the admin deposit queue.
+        """
+        status = serializers.ChoiceField(choices=Deposit.STATUS_CHOICES, required=False)
+        user = serializers.IntegerField(required=False, min_value=1)
+        date_from = serializers.DateField(required=False, help_text="First day to include, in the operator's timezone.")
+        date_to = serializers.DateField(required=False, help_text="Last day to include, in the operator's timezone.")
+
+        def filter(self, queryset):
+            """
+            Apply the validated filters as range conditions the deposit indexes can serve.
+            """
+            data = self.validated_data
+            if 'status' in data:
+                queryset = queryset.filter(status=data['status'])
+            if 'user' in data:
+                queryset = queryset.filter(user_id=data['user'])
+            if 'date_from' in data:
+                queryset = queryset.filter(date_time__gte=get_day_window(data['date_from'])[0])
+            if 'date_to' in data:
+                queryset = queryset.filter(date_time__lt=get_day_window(data['date_to'])[1])
+            return queryset
+
     class UpdateStatus(serializers.ModelSerializer):
         """
         Serializer for updating the status of a deposit.
@@ -112,67 +135,54 @@ class DepositSerializer:
             """
             Update the deposit status and adjust the user's wallet balance based on the status transition.
             """
-            old_status = instance.status
-            new_status = validated_data.get("status")
-
-            # Update the deposit instance
-            instance.status = new_status
-            instance.save()
-
-            user = instance.user
-
-            self.adjust_wallet_balance(
-                user=instance.user,
-                amount=instance.amount,
-                old_status=old_status,
-                new_status=new_status,
-            )
-
+            reviewed, _ = DepositReviewService().review([instance.pk], validated_data.get("status"))
+            if reviewed:
+                instance.status = reviewed[0].status
+                instance.updated_at = reviewed[0].updated_at
             return instance
 
-        def adjust_wallet_balance(self, user, amount, old_status, new_status):
+    class BatchReview(serializers.Serializer):
+        """
+        Serializer for confirming or rejecting many deposits at once.
+        """
+        deposit_ids = serializers.ListField(
+            child=serializers.IntegerField(min_value=1), min_length=1, max_length=1000
+        )
+        status = serializers.ChoiceField(choices=["Confirmed", "Rejected"])
+        transactional_password = serializers.CharField(write_only=True)
+
+        def validate_transactional_password(self, value):
             """
-            Adjust the user's wallet balance based on status changes.
+            Validate the transactional password from the user.
             """
-            if old_status != "Confirmed" and new_status == "Confirmed":
-                # Increment wallet balance when status changes to Confirmed
-                user.wallet.balance += amount
-                user.wallet.save()
-                self.handle_referral_bonus(user,amount)
-                print(f"Wallet increased: User {user.id} balance is now {user.wallet.balance}")
-
-            elif old_status == "Confirmed" and new_status != "Confirmed":
-                # Decrement wallet balance when status changes from Confirmed
-                user.wallet.balance -= amount
-                user.wallet.save()
-                print(f"Wallet decreased: User {user.id} balance is now {user.wallet.balance}")
-
-        def handle_referral_bonus(user, amount):
+            user = self.context.get("request").user
+            if user.transactional_password != value:
+                raise serializers.ValidationError("Invalid transactional password.")
+            return value
+
+        def save(self):
             """
-            Check if the user has an associated invitation and award the referral bonus if applicable.
+            Review the deposits in one transaction.
+            Returns a tuple: (reviewed deposits, ids that were not found or already had the status)
             """
-            try:
-                # Retrieve the invitation for the user
-                invitation = user.invitation  # Access the Invitation instance associated with the user
-                if not invitation.received_bonus:
-                    # Retrieve settings to calculate the bonus percentage
-                    settings = get_settings()
-                    bonus_percentage = settings.percentage_of_sponsors
-                    bonus_amount = amount * (bonus_percentage / 100)
-
-                    # Award the referral bonus to the referrer
-                    referral = invitation.referral
-                    referral.wallet.balance += bonus_amount
-                    referral.wallet.save()
-
-                    # Mark the bonus as received
-                    invitation.received_bonus = True
-                    invitation.save()
-                    create_user_notification(referral,"Referral Bonus",f"You have recieved a referral bonus of {bonus_amount:.2f}, Your current balance is {referral.wallet.balance}")
-                    print(f"Referral bonus of {bonus_amount:.2f} awarded to user {referral.username} (ID: {referral.id}).")
-            except Invitation.DoesNotExist:
-                # Handle case where no invitation is found
-                print(f"No invitation found for user {user.username}.")
+            return DepositReviewService().review(self.validated_data["deposit_ids"], self.validated_data["status"])
+
+
+class ExportSerializer(serializers.Serializer):
+    """
+    Query parameters of the admin exports. Pass the export's allowed statuses as `statuses` in the context.
+    The format is named `file_format`, since DRF reserves `format` for content negotiation.
+    """
+    file_format = serializers.ChoiceField(choices=STREAM_FORMATS, default="csv")
+    date_from = serializers.DateField(required=False, help_text="First day to include, in the operator's timezone.")
+    date_to = serializers.DateField(required=False, help_text="Last day to include, in the operator's timezone.")
+    status = serializers.CharField(required=False)
+
+    def validate_status(self, value):
+        statuses = self.context.get("statuses", [])
+        if value not in statuses:
+            raise serializers.ValidationError(f"Invalid status: {value}. Allowed: {statuses}")
+        return value
 
 
 class EventSerializer(serializers.ModelSerializer):
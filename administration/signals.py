@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import DashboardRollup, Settings
+from shared.helpers import clear_settings
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Settings)
+@receiver(post_delete, sender=Settings)
+def clear_settings_caches(sender, **kwargs):
+    """
+    Signal to invalidate the cached Settings (and the operator timezone read from them)
+    whenever the Settings change. Cleared again on commit so no worker keeps a stale copy.
+    """
+    clear_settings()
+    transaction.on_commit(clear_settings)
+
+
+@receiver(post_save, sender=User)
+def count_registration(sender, instance, created, **kwargs):
+    """
+    Signal to add every new user, staff included as the dashboard always counted them,
+    to today's dashboard registrations.
+    """
+    if created:
+        DashboardRollup.record(registrations=1)
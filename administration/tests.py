@@ -1,3 +1,577 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import pytz
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from finances.models import Deposit, PaymentMethod, Withdrawal
+from game.models import Game, UserGameStats
+from notification.models import Notification
+from shared.helpers import get_day_window, get_today, get_year_window
+from shared.testing import CacheResetTestCase, create_admin, create_pack, create_products, create_settings, create_user
+from users.models import Invitation
+from users.serializers import DashboardSerializer
+from wallet.models import BalanceAdjustment, OnHoldPay, Wallet
+from .exports import EXPORTS
+from .models import DashboardRollup
+
+User = get_user_model()
+
+
+class AdminUserListTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pack = create_pack()
+        cls.admin = create_admin()
+        for index in range(20):
+            user = create_user(f"user{index}")
+            Game.objects.create(user=user, amount=Decimal("10.00"), commission=Decimal("0.10"), played=True)
+            Game.objects.create(
+                user=user, amount=Decimal("50.00"), commission=Decimal("2.50"), played=True, special_product=True
+            )
+        Wallet.objects.update(package=cls.pack)
+        UserGameStats.rebuild(list(User.objects.values_list('pk', flat=True)))
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def list_users(self, page_size, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/site_admin/users/", {"page_size": page_size, **params})
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        # Warm the pack tier and settings caches
+        self.list_users(1)
+
+        small_page, small_page_queries = self.list_users(2)
+        large_page, large_page_queries = self.list_users(20)
+
+        self.assertEqual(len(small_page.data["data"]["items"]), 2)
+        self.assertEqual(len(large_page.data["data"]["items"]), 20)
+        self.assertEqual(small_page_queries, large_page_queries)
+
+    def test_pages_follow_the_cursor_without_repeats(self):
+        response, _ = self.list_users(8, count="true")
+        self.assertEqual(response.data["data"]["pagination"]["count"], 20)
+
+        seen = [user["id"] for user in response.data["data"]["items"]]
+        next_link = response.data["data"]["pagination"]["next"]
+        while next_link:
+            response = self.client.get(next_link)
+            seen += [user["id"] for user in response.data["data"]["items"]]
+            next_link = response.data["data"]["pagination"]["next"]
+
+        self.assertEqual(len(seen), 20)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_ordering_by_games_played_reads_the_stats_rows(self):
+        UserGameStats.objects.filter(user__username="user7").update(games_played=50)
+
+        response, _ = self.list_users(5, ordering="-total_games_played")
+        items = response.data["data"]["items"]
+        self.assertEqual(items[0]["username"], "user7")
+
+        next_page = self.client.get(response.data["data"]["pagination"]["next"])
+        self.assertNotIn("user7", [user["username"] for user in next_page.data["data"]["items"]])
+
+    def test_pages_reach_every_user_when_sorting_on_a_nullable_field(self):
+        UserGameStats.objects.update(last_played_at=None)
+        UserGameStats.objects.filter(user__username__in=["user3", "user11"]).update(last_played_at=now())
+
+        response, _ = self.list_users(5, ordering="-game_stats__last_played_at")
+        seen = [user["username"] for user in response.data["data"]["items"]]
+        next_link = response.data["data"]["pagination"]["next"]
+        while next_link:
+            response = self.client.get(next_link)
+            seen += [user["username"] for user in response.data["data"]["items"]]
+            next_link = response.data["data"]["pagination"]["next"]
+
+        self.assertEqual(len(seen), 20)
+        self.assertEqual(len(set(seen)), 20)
+        self.assertEqual(set(seen[:2]), {"user3", "user11"})
+
+    def test_pages_of_tied_sort_values_are_walked_both_ways_without_an_offset(self):
+        # Every user has played the same number of games, so only the primary key orders them
+        response, _ = self.list_users(6, ordering="total_games_played")
+        pages = [[user["id"] for user in response.data["data"]["items"]]]
+        with CaptureQueriesContext(connection) as queries:
+            while response.data["data"]["pagination"]["next"]:
+                response = self.client.get(response.data["data"]["pagination"]["next"])
+                pages.append([user["id"] for user in response.data["data"]["items"]])
+
+        seen = [user_id for page in pages for user_id in page]
+        self.assertEqual(seen, sorted(User.objects.filter(is_staff=False).values_list("id", flat=True)))
+        self.assertFalse([query for query in queries if "OFFSET" in query["sql"]])
+
+        for page in reversed(pages[:-1]):
+            response = self.client.get(response.data["data"]["pagination"]["previous"])
+            self.assertEqual([user["id"] for user in response.data["data"]["items"]], page)
+        self.assertIsNone(response.data["data"]["pagination"]["previous"])
+
+    def test_a_malformed_cursor_is_rejected(self):
+        response = self.client.get("/site_admin/users/", {"cursor": "cD1ub3Rqc29u"})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_reads_game_totals_from_annotations(self):
+        response, _ = self.list_users(20)
+
+        user = response.data["data"]["items"][0]
+        self.assertEqual(user["total_product_submitted"], 2)
+        self.assertEqual(user["total_negative_product_submitted"], 1)
+        self.assertEqual(user["total_available_play"], self.pack.daily_missions)
+        self.assertEqual(user["wallet"]["package"]["id"], self.pack.pk)
+
+
+class DepositBatchReviewTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_settings(percentage_of_sponsors=10)
+        cls.basic = create_pack()
+        cls.silver = create_pack("Silver", Decimal("100.00"))
+        cls.admin = create_admin()
+        cls.depositor, cls.other, cls.referrer = [create_user(f"user{index}") for index in range(3)]
+        Wallet.objects.update(balance=Decimal("0.00"), package=cls.basic)
+        Invitation.objects.create(referral=cls.referrer, user=cls.depositor)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.deposits = [
+            Deposit.objects.create(user=self.depositor, amount=Decimal("60.00"), screenshot="deposit.png"),
+            Deposit.objects.create(user=self.depositor, amount=Decimal("50.00"), screenshot="deposit.png"),
+            Deposit.objects.create(user=self.other, amount=Decimal("20.00"), screenshot="deposit.png"),
+        ]
+
+    def review(self, deposit_ids, status):
+        return self.client.post(
+            "/site_admin/deposits/batch-review/",
+            {"deposit_ids": deposit_ids, "status": status, "transactional_password": "1234"},
+            format="json",
+        )
+
+    def test_confirming_credits_wallets_retiers_and_pays_the_referral_bonus_once(self):
+        response = self.review([deposit.pk for deposit in self.deposits] + [999999], "Confirmed")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["skipped"], [999999])
+        depositor_wallet = Wallet.objects.get(user=self.depositor)
+        self.assertEqual(depositor_wallet.balance, Decimal("110.00"))
+        self.assertEqual(depositor_wallet.package_id, self.silver.pk)
+        self.assertEqual(Wallet.objects.get(user=self.other).balance, Decimal("20.00"))
+        self.assertEqual(Wallet.objects.get(user=self.referrer).balance, Decimal("6.00"))
+        self.assertEqual(Notification.objects.filter(user=self.referrer, title="Referral Bonus").count(), 1)
+        self.assertFalse(Deposit.objects.exclude(status="Confirmed").exists())
+
+    def test_query_count_does_not_depend_on_the_number_of_deposits(self):
+        with CaptureQueriesContext(connection) as one_deposit:
+            self.review([self.deposits[2].pk], "Confirmed")
+        with CaptureQueriesContext(connection) as two_deposits:
+            self.review([deposit.pk for deposit in self.deposits[:2]], "Confirmed")
+
+        self.assertLessEqual(len(two_deposits), len(one_deposit) + 2)
+
+    def test_rejecting_a_confirmed_deposit_debits_it(self):
+        self.review([deposit.pk for deposit in self.deposits], "Confirmed")
+        response = self.review([self.deposits[1].pk], "Rejected")
+
+        self.assertEqual(response.data["data"]["updated"], [self.deposits[1].pk])
+        wallet = Wallet.objects.get(user=self.depositor)
+        self.assertEqual(wallet.balance, Decimal("60.00"))
+        self.assertEqual(wallet.package_id, self.basic.pk)
+
+
+class DepositQueueTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_settings()
+        create_pack()
+        cls.admin = create_admin()
+        cls.depositor, cls.other = create_user("depositor"), create_user("other")
+        cls.old, cls.confirmed, cls.pending = [
+            Deposit.objects.create(user=user, amount=Decimal("10.00"), status=status, screenshot="deposit.png")
+            for user, status in [(cls.depositor, "Pending"), (cls.depositor, "Confirmed"), (cls.other, "Pending")]
+        ]
+        Deposit.objects.filter(pk=cls.old.pk).update(date_time=now() - timedelta(days=3))
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def list_deposits(self, **params):
+        response = self.client.get("/site_admin/deposits/", params)
+        self.assertEqual(response.status_code, 200)
+        return [deposit["id"] for deposit in response.data["data"]["items"]]
+
+    def test_queue_is_newest_first(self):
+        self.assertEqual(self.list_deposits(), [self.pending.pk, self.confirmed.pk, self.old.pk])
+
+    def test_status_filter(self):
+        self.assertEqual(self.list_deposits(status="Pending"), [self.pending.pk, self.old.pk])
+
+    def test_user_filter(self):
+        self.assertEqual(self.list_deposits(user=self.depositor.pk), [self.confirmed.pk, self.old.pk])
+
+    def test_date_filters_cover_whole_days(self):
+        today = get_today()
+
+        self.assertEqual(self.list_deposits(date_from=today), [self.pending.pk, self.confirmed.pk])
+        self.assertEqual(self.list_deposits(date_to=today - timedelta(days=1)), [self.old.pk])
+        self.assertEqual(
+            self.list_deposits(status="Pending", user=self.depositor.pk, date_to=today), [self.old.pk]
+        )
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get("/site_admin/deposits/", {"status": "Unknown", "date_from": "yesterday"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_pages_follow_the_cursor(self):
+        response = self.client.get("/site_admin/deposits/", {"page_size": 2})
+        next_page = self.client.get(response.data["data"]["pagination"]["next"])
+
+        self.assertEqual([deposit["id"] for deposit in next_page.data["data"]["items"]], [self.old.pk])
+        self.assertIsNone(next_page.data["data"]["pagination"]["next"])
+
+    def test_pending_badge_counts_pending_deposits_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/site_admin/deposits/pending-count/")
+
+        self.assertEqual(response.data["data"], {"pending": 2})
+        self.assertEqual(len(queries), 1)
+
+    def test_query_count_does_not_depend_on_the_page_size(self):
+        self.list_deposits()
+        with CaptureQueriesContext(connection) as one_deposit:
+            self.list_deposits(page_size=1, status="Pending")
+        with CaptureQueriesContext(connection) as three_deposits:
+            self.list_deposits(page_size=3)
+
+        self.assertEqual(len(one_deposit), len(three_deposits))
+
+
+class ExportTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pack = create_pack()
+        cls.admin = create_admin()
+        cls.user = create_user("exported")
+        Wallet.objects.filter(user=cls.user).update(balance=Decimal("25.00"), package=cls.pack)
+        cls.deposit = Deposit.objects.create(user=cls.user, amount=Decimal("30.00"), screenshot="deposit.png")
+        payment_method = PaymentMethod.objects.create(user=cls.user, name="USDT", wallet="address")
+        cls.withdrawal = Withdrawal.objects.create(
+            user=cls.user, payment_method=payment_method, amount=Decimal("5.00"), transaction_reference="ref"
+        )
+        cls.played, cls.unplayed = [
+            Game.objects.create(user=cls.user, amount=Decimal("20.00"), commission=Decimal("0.20"), played=played)
+            for played in (True, False)
+        ]
+        cls.played.products.set(create_products(2))
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def export(self, name, **params):
+        response = self.client.get(f"/site_admin/exports/{name}/", params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def read_csv(self, content):
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_each_export_writes_its_columns_and_rows(self):
+        expected = {
+            "users": (self.user.pk, {"username": "exported", "balance": "25.00", "package": "Basic"}),
+            "deposits": (self.deposit.pk, {"username": "exported", "amount": "30.00", "status": "Pending"}),
+            "withdrawals": (self.withdrawal.pk, {"payment_method_name": "USDT", "wallet_address": "address"}),
+            "games": (self.played.pk, {"username": "exported", "products": "Product 0; Product 1", "played": "True"}),
+        }
+        for name, (row_id, values) in expected.items():
+            with self.subTest(name=name):
+                content = self.export(name)
+                _, fields, _ = EXPORTS[name]
+
+                self.assertEqual(next(csv.reader(io.StringIO(content))), fields)
+                row = {row["id"]: row for row in self.read_csv(content)}[str(row_id)]
+                self.assertEqual({field: row[field] for field in values}, values)
+
+    def test_status_filter_and_ndjson_format(self):
+        content = self.export("games", status="unplayed", file_format="ndjson")
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.unplayed.pk])
+
+    def test_date_filters_cover_whole_days(self):
+        today = get_today()
+
+        self.assertEqual(len(self.read_csv(self.export("deposits", date_from=today, date_to=today))), 1)
+        self.assertEqual(self.read_csv(self.export("deposits", date_to=today - timedelta(days=1))), [])
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({"status": "Processed"}, {"date_from": "yesterday"}, {"file_format": "xml"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/site_admin/exports/deposits/", params).status_code, 400)
+
+    def test_export_data_command_writes_to_stdout_or_a_file(self):
+        output = io.StringIO()
+        call_command("export_data", "withdrawals", "--status", "Pending", stdout=output)
+        self.assertEqual([row["id"] for row in self.read_csv(output.getvalue())], [str(self.withdrawal.pk)])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "users.ndjson")
+            call_command("export_data", "users", "--format", "ndjson", "--output", path)
+            with open(path) as file:
+                self.assertEqual([json.loads(line)["username"] for line in file], ["exported"])
+
+        with self.assertRaises(CommandError):
+            call_command("export_data", "games", "--status", "Pending")
+
+
+class BulkAdjustmentTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+        cls.users = [create_user(f"user{index}") for index in range(2)]
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_valid_rows_are_applied_and_logged_and_every_row_is_reported(self):
+        content = (
+            "user,field,value,reason\n"
+            f"{self.users[0].pk},salary,250.00,March salary\n"
+            "user1,commission,12.50,Correction\n"
+            "user1,commission,13.00,Duplicate\n"
+            "nobody,balance,10,Unknown\n"
+        )
+        response = self.client.post(
+            "/site_admin/users/bulk-adjust/",
+            {"file": SimpleUploadedFile("adjustments.csv", content.encode()), "admin_password": "1234"},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["status"] for row in response.data["data"]], ["applied", "applied", "failed", "failed"]
+        )
+        self.assertEqual(Wallet.objects.get(user=self.users[0]).salary, Decimal("250.00"))
+        self.assertEqual(Wallet.objects.get(user=self.users[1]).commission, Decimal("12.50"))
+        self.assertEqual(
+            list(BalanceAdjustment.objects.order_by('pk').values_list('field', 'new_value', 'reason', 'created_by')),
+            [("salary", Decimal("250.00"), "March salary", self.admin.pk), ("commission", Decimal("12.50"), "Correction", self.admin.pk)],
+        )
+
+
+    def test_an_all_digit_username_is_never_applied_to_the_user_with_that_id(self):
+        digits = create_user(str(self.users[1].pk))
+        content = (
+            "user,user_id,username,field,value,reason\n"
+            f"{digits.username},,,balance,10.00,Ambiguous\n"
+            f",{self.users[1].pk},,balance,20.00,By id\n"
+            f",,{digits.username},balance,30.00,By username\n"
+        )
+        response = self.client.post(
+            "/site_admin/users/bulk-adjust/",
+            {"file": SimpleUploadedFile("adjustments.csv", content.encode()), "admin_password": "1234"},
+            format="multipart",
+        )
+
+        rows = response.data["data"]
+        self.assertEqual([row["status"] for row in rows], ["failed", "applied", "applied"])
+        self.assertTrue(rows[0]["error"].startswith("Ambiguous user"))
+        self.assertEqual(Wallet.objects.get(user=self.users[1]).balance, Decimal("20.00"))
+        self.assertEqual(Wallet.objects.get(user=digits).balance, Decimal("30.00"))
+
+
+class NegativeGameListTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_pack()
+        cls.admin = create_admin()
+        cls.on_hold = OnHoldPay.objects.create(min_amount=Decimal("10.00"), max_amount=Decimal("20.00"))
+        cls.products = create_products(3)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def create_negative_games(self, start, count):
+        for index in range(start, start + count):
+            user = create_user(f"user{index}")
+            game = Game.objects.create(
+                user=user,
+                on_hold=self.on_hold,
+                amount=Decimal("15.00"),
+                commission=Decimal("1.00"),
+                special_product=True,
+                game_number=3,
+            )
+            game.products.set(self.products[:index % 3 + 1])
+
+    def list_games(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/site_admin/negative-users/", {"page_size": 50})
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_depend_on_the_number_of_games(self):
+        self.create_negative_games(0, 2)
+        self.list_games()
+        _, few_games_queries = self.list_games()
+
+        self.create_negative_games(2, 8)
+        response, many_games_queries = self.list_games()
+
+        self.assertEqual(len(response.data["data"]["items"]), 10)
+        self.assertEqual(few_games_queries, many_games_queries)
+
+    def test_listing_does_not_create_payment_methods(self):
+        self.create_negative_games(0, 3)
+
+        response, _ = self.list_games()
+
+        self.assertFalse(PaymentMethod.objects.exists())
+        counts = {item["user"]["username"]: item["number_of_negative_product"] for item in response.data["data"]["items"]}
+        self.assertEqual(counts, {"user0": 1, "user1": 2, "user2": 3})
+
+
+class DashboardRollupTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+        cls.user = create_user("player")
+
+    def create_game(self, **fields):
+        return Game.objects.create(user=self.user, amount=Decimal("10.00"), commission=Decimal("0.10"), **fields)
+
+    def rollups(self):
+        return {
+            rollup.date: (rollup.registrations, rollup.submissions, rollup.logins)
+            for rollup in DashboardRollup.objects.all()
+        }
+
+    def test_registrations_are_counted_on_commit_staff_included(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_user("newcomer")
+            create_admin("operator")
+
+        self.assertEqual(DashboardRollup.objects.get(date=get_today()).registrations, 2)
+        dashboard = DashboardSerializer(self.admin).data
+        self.assertEqual(dashboard["user_registrations_per_month"][get_today().month], 2)
+
+    def test_a_played_game_counts_today(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            DashboardRollup.record_game_submitted(self.create_game())
+
+        self.assertEqual(self.rollups(), {get_today(): (0, 1, 0)})
+        self.assertEqual(DashboardSerializer(self.admin).data["total_submissions"], 1)
+
+    def test_a_game_held_today_is_not_counted_twice(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            DashboardRollup.record_game_submitted(self.create_game(pending=True))
+
+        self.assertEqual(self.rollups(), {})
+
+    def test_a_game_held_on_an_earlier_day_moves_to_today(self):
+        game = self.create_game(pending=True)
+        Game.objects.filter(pk=game.pk).update(updated_at=now() - timedelta(days=1))
+        game.refresh_from_db()
+        yesterday = get_today() - timedelta(days=1)
+        DashboardRollup.objects.create(date=yesterday, submissions=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DashboardRollup.record_game_submitted(game)
+
+        self.assertEqual(self.rollups(), {yesterday: (0, 0, 0), get_today(): (0, 1, 0)})
+
+    def test_rebuild_recomputes_the_rollups_from_history(self):
+        march_10, march_11 = datetime(2025, 3, 10, 12, tzinfo=pytz.utc), datetime(2025, 3, 11, 12, tzinfo=pytz.utc)
+        User.objects.filter(pk=self.admin.pk).update(date_joined=march_10)
+        User.objects.filter(pk=self.user.pk).update(date_joined=march_10, last_connection=march_11)
+        counted = [self.create_game(played=True), self.create_game(pending=True)]
+        ignored = [self.create_game(), self.create_game(played=True, is_active=False)]
+        Game.objects.filter(pk__in=[game.pk for game in counted + ignored]).update(updated_at=march_11)
+        DashboardRollup.objects.create(date=get_today(), submissions=7)
+
+        call_command("rebuild_dashboard_rollups", stdout=io.StringIO())
+
+        self.assertEqual(self.rollups(), {march_10.date(): (2, 0, 0), march_11.date(): (0, 2, 1)})
+
+
+class OperatorDayWindowTestCase(CacheResetTestCase):
+
+    def utc(self, *args):
+        return datetime(*args, tzinfo=pytz.utc)
+
+    def at(self, moment):
+        return mock.patch("django.utils.timezone.now", return_value=moment)
+
+    def test_the_day_turns_at_local_midnight_ahead_of_utc(self):
+        create_settings(timezone="Asia/Tokyo")
+
+        with self.at(self.utc(2025, 12, 31, 14, 59)):
+            self.assertEqual(get_today(), date(2025, 12, 31))
+            self.assertEqual(get_day_window(), (self.utc(2025, 12, 30, 15), self.utc(2025, 12, 31, 15)))
+            self.assertEqual(get_year_window(), (self.utc(2024, 12, 31, 15), self.utc(2025, 12, 31, 15)))
+
+        with self.at(self.utc(2025, 12, 31, 15)):
+            self.assertEqual(get_today(), date(2026, 1, 1))
+            self.assertEqual(get_day_window(), (self.utc(2025, 12, 31, 15), self.utc(2026, 1, 1, 15)))
+            self.assertEqual(get_year_window(), (self.utc(2025, 12, 31, 15), self.utc(2026, 12, 31, 15)))
+
+    def test_the_day_turns_at_local_midnight_behind_utc(self):
+        create_settings(timezone="America/New_York")
+
+        with self.at(self.utc(2026, 1, 1, 4, 59)):
+            self.assertEqual(get_today(), date(2025, 12, 31))
+            self.assertEqual(get_year_window(), (self.utc(2025, 1, 1, 5), self.utc(2026, 1, 1, 5)))
+
+        with self.at(self.utc(2026, 1, 1, 5)):
+            self.assertEqual(get_today(), date(2026, 1, 1))
+            self.assertEqual(get_day_window(), (self.utc(2026, 1, 1, 5), self.utc(2026, 1, 2, 5)))
+
+    def test_day_windows_follow_daylight_saving_changes(self):
+        create_settings(timezone="America/New_York")
+
+        self.assertEqual(get_day_window(date(2025, 3, 9)), (self.utc(2025, 3, 9, 5), self.utc(2025, 3, 10, 4)))
+        self.assertEqual(get_day_window(date(2025, 11, 2)), (self.utc(2025, 11, 2, 4), self.utc(2025, 11, 3, 5)))
+
+    def test_a_timezone_change_applies_immediately(self):
+        settings = create_settings(timezone="Asia/Tokyo")
+        moment = self.utc(2025, 12, 31, 20)
+
+        with self.at(moment):
+            self.assertEqual(get_today(), date(2026, 1, 1))
+            settings.timezone = "America/New_York"
+            settings.save()
+            self.assertEqual(get_today(), date(2025, 12, 31))
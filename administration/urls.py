@@ -1,6 +1,6 @@
 from django.urls import path,include
 from rest_framework.routers import DefaultRouter
-from .views import SettingsViewSet,AdminDepositViewSet,EventViewSet,AdminUserManagementViewSet,OnHoldViewSet,AdminNegativeUserManagementViewSet
+from .views import SettingsViewSet,AdminDepositViewSet,EventViewSet,AdminUserManagementViewSet,OnHoldViewSet,AdminNegativeUserManagementViewSet,AdminExportViewSet
 
 router = DefaultRouter()
 router.register(r'settings', SettingsViewSet, basename='settings')
@@ -11,6 +11,7 @@ router.register(r'events', EventViewSet, basename='event')
 router.register(r'users', AdminUserManagementViewSet, basename='users')
 router.register(r'onholds', OnHoldViewSet, basename='onhold')
 router.register(r'negative-users', AdminNegativeUserManagementViewSet, basename='negative-users')
+router.register(r'exports', AdminExportViewSet, basename='exports')
 
 
 urlpatterns = [
@@ -1,7 +1,10 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
 from rest_framework.viewsets import GenericViewSet,ViewSet,ModelViewSet
 from rest_framework.exceptions import NotFound
 from drf_yasg.utils import swagger_auto_schema
-from django.db.models import Count, Q, F ,OrderBy, Value
+from django.db.models import Count, Q, F ,OrderBy, Value, OuterRef, Subquery
 from django.db.models.functions import Coalesce
 from rest_framework.filters import OrderingFilter,SearchFilter
 from drf_yasg import openapi
@@ -10,9 +13,12 @@ from rest_framework.decorators import action
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from .models import Settings,Event
-from .serializers import SettingsSerializer,DepositSerializer,SettingsVideoSerializer,EventSerializer
+from .serializers import SettingsSerializer,DepositSerializer,SettingsVideoSerializer,EventSerializer,ExportSerializer
+from .exports import EXPORTS
 from shared.utils import standard_response as Response
-from shared.helpers import get_settings
+from shared.filters import AliasOrderingFilter
+from shared.pagination import KeysetPagination
+from shared.helpers import get_settings_data, get_today, stream_rows
 from shared.mixins import StandardResponseMixin
 from core.permissions import IsSiteAdmin,IsAdminOrReadOnly
 from finances.models import Deposit
@@ -21,14 +27,18 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from django.contrib.auth import get_user_model
 from users.serializers import UserProfileListSerializer,AdminUserUpdateSerializer
+from users.last_connection import apply_pending_connections
 from wallet.serializers import OnHoldPaySerializer
 from wallet.models import OnHoldPay
-from game.models import Game
+from game.models import Game, DailyGameStats
 from game.serializers import AdminNegativeUserSerializer
 
 
 User = get_user_model()
 
+# Sort value of `last_played_at` for users who never played
+NEVER_PLAYED = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 class SettingsViewSet(GenericViewSet):
     """
@@ -60,14 +70,13 @@ class SettingsViewSet(GenericViewSet):
         """
         Handle GET request for settings.
         """
-        instance = get_settings()
-        if not instance:
+        data = get_settings_data()
+        if data is None:
             raise NotFound(detail="Settings not found.")
-        serializer = self.get_serializer(instance)
         return Response(
             success=True,
             message="Settings retrieved successfully.",
-            data=serializer.data,
+            data=data,
             status_code=status.HTTP_200_OK
         )
 
@@ -76,7 +85,7 @@ class SettingsViewSet(GenericViewSet):
         """
         Handle PATCH request to partially update settings.
         """
-        instance = get_settings()
+        instance = Settings.objects.first()
         if not instance:
             raise NotFound(detail="Settings not found.")
         serializer = self.get_serializer(instance, data=request.data, partial=True)  # Partial update enabled
@@ -152,23 +161,33 @@ class AdminDepositViewSet(StandardResponseMixin, ViewSet):
         action_to_serializer = {
             "list": DepositSerializer.List,
             "update_status": DepositSerializer.UpdateStatus,
+            "batch_review": DepositSerializer.BatchReview,
         }
         return action_to_serializer.get(self.action, DepositSerializer.List)
 
+    @swagger_auto_schema(query_serializer=DepositSerializer.QueueFilter)
     def list(self, request):
         """
-        List all deposits for admin users.
+        List deposits for admin users, newest first, one keyset page at a time.
+        Filter the queue with `status`, `user`, `date_from` and `date_to`.
         """
         if getattr(self, 'swagger_fake_view', False):
             return Response([], status=status.HTTP_200_OK)
 
-        deposits = Deposit.objects.all().order_by('-date_time')
-        serializer_class = self.get_serializer_class()
-        serializer = serializer_class(deposits, many=True)
-        return Response(
+        filters = DepositSerializer.QueueFilter(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        deposits = filters.filter(Deposit.objects.select_related('user'))
+        return self.keyset_paginated_response(deposits, self.get_serializer_class(), '-date_time')
+
+    @action(detail=False, methods=["get"], url_path="pending-count")
+    def pending_count(self, request):
+        """
+        Number of deposits waiting for review, for the admin badge.
+        """
+        return self.standard_response(
             success=True,
-            message="All deposits retrieved successfully.",
-            data=serializer.data,
+            message="Pending deposits counted successfully.",
+            data={"pending": Deposit.objects.filter(status="Pending").count()},
             status_code=status.HTTP_200_OK,
         )
 
@@ -199,6 +218,56 @@ class AdminDepositViewSet(StandardResponseMixin, ViewSet):
             status_code=status.HTTP_200_OK,
         )
 
+    @swagger_auto_schema(request_body=DepositSerializer.BatchReview)
+    @action(detail=False, methods=["post"], url_path="batch-review")
+    def batch_review(self, request):
+        """
+        Confirm or reject many deposits in one transaction.
+        Deposits that don't exist or already have the status are reported as skipped.
+        """
+        serializer = self.get_serializer_class()(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        reviewed, skipped = serializer.save()
+
+        return Response(
+            success=True,
+            message=f"{len(reviewed)} deposits updated successfully.",
+            data={
+                "updated": [deposit.pk for deposit in reviewed],
+                "skipped": skipped,
+            },
+            status_code=status.HTTP_200_OK,
+        )
+
+
+class AdminExportViewSet(ViewSet):
+    """
+    Admin ViewSet streaming users, deposits, withdrawals or games as CSV or NDJSON.
+    Rows are read in chunks and written as they are read, so memory use doesn't grow with the export.
+    """
+    permission_classes = [IsSiteAdmin]
+    lookup_field = "name"
+    lookup_value_regex = "|".join(EXPORTS)
+
+    @swagger_auto_schema(query_serializer=ExportSerializer)
+    def retrieve(self, request, name=None):
+        """
+        Stream one export, filtered with `date_from`, `date_to` and `status`.
+        """
+        rows, fields, statuses = EXPORTS[name]
+        serializer = ExportSerializer(data=request.query_params, context={"statuses": statuses})
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+        export_format = filters.pop("file_format")
+
+        suffix = "-".join(str(filters[key]) for key in ("date_from", "date_to", "status") if key in filters)
+        return stream_rows(
+            rows(**filters),
+            fields,
+            format=export_format,
+            filename=f"{name}-{suffix}" if suffix else name,
+        )
+
 
 class EventViewSet(StandardResponseMixin,ModelViewSet):
     """
@@ -216,22 +285,71 @@ class EventViewSet(StandardResponseMixin,ModelViewSet):
 class AdminUserManagementViewSet(StandardResponseMixin,ReadOnlyModelViewSet):
     serializer_class = UserProfileListSerializer
     permission_classes = [IsSiteAdmin]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """
         Annotate the queryset with complex fields and return it.
-        """
-        return User.objects.users().annotate(
-            total_games_played=Count('games', filter=Q(games__played=True)),
-            total_negative_product=Count('games', filter=Q(games__played=True)& Q(games__special_product=True)),
-            wallet_commission=F('wallet__commission')
+        Everything UserProfileListSerializer shows comes from this one query;
+        the game totals are read from the UserGameStats row and the pack from
+        the cached tier table, so sorting by them never aggregates the games.
+        The sortable values are never NULL, as the keyset pagination needs a value to resume from.
+        """
+        return User.objects.users().select_related('wallet', 'game_stats').annotate(
+            total_games_played=Coalesce(F('game_stats__games_played'), 0),
+            total_negative_product=Coalesce(F('game_stats__special_games_played'), 0),
+            total_product_submitted=F('game_stats__games_played'),
+            total_negative_product_submitted=F('game_stats__special_games_played'),
+            wallet_commission=Coalesce(F('wallet__commission'), Value(Decimal("0.00"))),
+            pending_games=Coalesce(F('game_stats__pending_games'), 0),
+            total_commission=Coalesce(F('game_stats__total_commission'), Value(Decimal("0.00"))),
+            # Users who never played sort before everyone who did
+            last_played_at=Coalesce(F('game_stats__last_played_at'), Value(NEVER_PLAYED)),
+            games_played_today=Coalesce(
+                Subquery(
+                    DailyGameStats.objects.filter(user=OuterRef('pk'), date=get_today()).values('games_played')[:1]
+                ),
+                0,
+            ),
         )
 
-    filter_backends = [OrderingFilter, SearchFilter]
+    filter_backends = [AliasOrderingFilter, SearchFilter]
     search_fields = ['username', 'email', 'phone_number','first_name','last_name']
-    ordering_fields = ['wallet__commission', 'total_games_played', 'total_negative_product',] 
+    ordering_fields = [
+        'wallet_commission', 'total_games_played', 'total_negative_product',
+        'pending_games', 'total_commission', 'last_played_at',
+    ]
+    ordering_aliases = {
+        'wallet__commission': 'wallet_commission',
+        'game_stats__pending_games': 'pending_games',
+        'game_stats__total_commission': 'total_commission',
+        'game_stats__last_played_at': 'last_played_at',
+    }
     ordering = ['-id'] 
 
+    def filter_queryset(self, queryset):
+        """
+        Also filter on the game stats with `?min_games_played=<n>` and `?has_pending_games=true`.
+        """
+        queryset = super().filter_queryset(queryset)
+        min_games_played = self.request.query_params.get('min_games_played')
+        if min_games_played:
+            if not min_games_played.isdigit():
+                raise ValidationError({"min_games_played": "A positive integer is required."})
+            queryset = queryset.filter(game_stats__games_played__gte=int(min_games_played))
+        if self.request.query_params.get('has_pending_games', '').lower() in ('1', 'true'):
+            queryset = queryset.filter(game_stats__pending_games__gt=0)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        """
+        Show the buffered `last_connection` of the users on the page.
+        """
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            page = apply_pending_connections(page)
+        return page
+
     def get_serializer_class(self):
         """
         Dynamically determine which serializer to use based on the action.
@@ -246,6 +364,8 @@ class AdminUserManagementViewSet(StandardResponseMixin,ReadOnlyModelViewSet):
             return AdminUserUpdateSerializer.UserProfit
         elif self.action == 'update_user_salary':
             return AdminUserUpdateSerializer.UserSalary
+        elif self.action == 'bulk_adjust':
+            return AdminUserUpdateSerializer.BulkAdjustment
         elif self.action == 'toggle_reg_bonus':
             return AdminUserUpdateSerializer.ToggleRegBonus
         elif self.action == 'toggle_user_min_balance':
@@ -321,6 +441,26 @@ class AdminUserManagementViewSet(StandardResponseMixin,ReadOnlyModelViewSet):
         user = serializer.save()
         return self.handle_action_response(user,"User Salary Updated Successfully")
 
+    @action(detail=False, methods=['post'], url_path='bulk-adjust', parser_classes=[MultiPartParser, FormParser])
+    def bulk_adjust(self, request):
+        """
+        Set balances, profits and salaries of many users from an uploaded CSV.
+        Valid rows are applied together; the response reports the result of every row.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = serializer.save()
+        applied = sum(1 for _, _, _, error in report if error is None)
+        return self.standard_response(
+                success=True,
+                message=f"{applied} adjustments applied, {len(report) - applied} rows rejected.",
+                data=[
+                    {"row": row_number, "user": user, "field": field, "status": "failed" if error else "applied", "error": error}
+                    for row_number, user, field, error in report
+                ],
+                status_code=status.HTTP_200_OK,
+            )
+
     @action(detail=False, methods=['post'], url_path='toggle-reg-bonus')
     def toggle_reg_bonus(self, request):
         """
@@ -370,9 +510,51 @@ class OnHoldViewSet(StandardResponseMixin,ModelViewSet):
 class AdminNegativeUserManagementViewSet(StandardResponseMixin,ModelViewSet):
     serializer_class = AdminNegativeUserSerializer.List
     permission_classes = [IsSiteAdmin]
+    pagination_class = KeysetPagination
+    pagination_ordering = '-updated_at'
     
     def get_queryset(self):
-        return Game.objects.filter(is_active=True,played=False,special_product=True)
+        """
+        Everything AdminNegativeUserSerializer.List shows comes from this query and
+        two prefetches: the user's game totals and the product count are annotated,
+        and the wallet, payment method and on-hold range are joined.
+        """
+        return Game.objects.filter(is_active=True,played=False,special_product=True).select_related(
+            'user__wallet', 'user__payment_method', 'on_hold',
+        ).prefetch_related(
+            'user__groups', 'user__user_permissions',
+        ).annotate(
+            product_count=Coalesce(
+                Subquery(
+                    Game.products.through.objects.filter(game_id=OuterRef('pk')).order_by().values('game_id').annotate(
+                        count=Count('id')
+                    ).values('count')[:1]
+                ),
+                0,
+            ),
+            user_total_product_submitted=F('user__game_stats__games_played'),
+            user_total_negative_product_submitted=F('user__game_stats__special_games_played'),
+            user_games_played_today=Coalesce(
+                Subquery(
+                    DailyGameStats.objects.filter(user=OuterRef('user'), date=get_today()).values('games_played')[:1]
+                ),
+                0,
+            ),
+        )
+
+    def paginate_queryset(self, queryset):
+        """
+        Hand the annotated totals to the users on the page, where UserProfileListSerializer
+        reads them, and show their buffered `last_connection`.
+        """
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            for game in page:
+                game.user.total_product_submitted = game.user_total_product_submitted
+                game.user.total_negative_product_submitted = game.user_total_negative_product_submitted
+                game.user.games_played_today = game.user_games_played_today
+            apply_pending_connections([game.user for game in page])
+        return page
 
     def get_serializer_class(self):
         if self.action in ['retrieve', 'list']:
@@ -1,5 +1,6 @@
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
+from django.db.models import BooleanField, Case, Q, When
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 
 User = get_user_model()  
@@ -8,19 +9,44 @@ User = get_user_model()
 class EmailOrUsernameBackend(ModelBackend):
     """
     Custom authentication backend that allows authentication using email or username.
+    An identifier containing "@" is looked up by email through the lower(email) index,
+    anything else by username, so each login runs a single indexed query.
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            # Look up user by username or email
-            user = User.objects.get(
-                Q(username=username) | Q(email__iexact=username)
-            )
-            # Validate the password
-            if user.check_password(password) and self.user_can_authenticate(user):
-                return user
-        except User.DoesNotExist:
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = self.get_user_by_identifier(username)
+        if user is None:
+            # Run the password hasher once anyway, so unknown identifiers
+            # take as long as wrong passwords
+            User().set_password(password)
             return None
 
+        # Validate the password
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user_by_identifier(self, identifier):
+        """
+        Look up a user by email (case-insensitive) or by username, in one query.
+        Usernames may contain "@" too, so an email-like identifier also matches a
+        username, served by the username index; a matching email takes precedence.
+        """
+        if "@" not in identifier:
+            return User.objects.filter(username=identifier).first()
+        email = identifier.lower()
+        return (
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(Q(email_lower=email) | Q(username=identifier))
+            .annotate(matched_username=Case(When(email_lower=email, then=False), default=True, output_field=BooleanField()))
+            .order_by('matched_username', 'pk')
+            .first()
+        )
+
     def get_user(self, user_id):
         """
         Retrieve the user by their ID.
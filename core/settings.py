@@ -1,13 +1,12 @@
 from pathlib import Path
 from datetime import timedelta
 import os
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Load environment variables from the .env file
@@ -300,14 +299,68 @@ SWAGGER_SETTINGS = {
 }
 
 
+"-------------------- Game Settings ---------------------------------------"
+# Create a user's remaining games for the day in one bulk insert the first time a game is needed,
+# so each submission only advances to the next pre-generated game
+GAME_PREGENERATE_DAILY_GAMES = True
+
+# Key for the permutation that turns the rating number sequence into random-looking numbers.
+# Changing it after numbers have been issued can produce duplicates.
+RATING_NO_PERMUTATION_KEY = os.getenv('RATING_NO_PERMUTATION_KEY', 'adsterra-rating-no')
+
+
+"-------------------- Last Connection ---------------------------------------"
+# Record at most one connection per user within this many seconds
+LAST_CONNECTION_RESOLUTION_SECONDS = int(os.getenv('LAST_CONNECTION_RESOLUTION_SECONDS', 60))
+
+# How often each worker writes its buffered connections in one bulk update
+LAST_CONNECTION_FLUSH_INTERVAL_SECONDS = int(os.getenv('LAST_CONNECTION_FLUSH_INTERVAL_SECONDS', 60))
+
+
+# How long an authenticated user, with their wallet, stays cached between changes
+AUTH_USER_CACHE_TIMEOUT_SECONDS = int(os.getenv('AUTH_USER_CACHE_TIMEOUT_SECONDS', 300))
+
+
+"-------------------- Cache ---------------------------------------"
+# Cached users, pack tiers, settings and the product pool are invalidated through this
+# cache, so every worker has to share it, and it is read on every request, so it must not
+# be the database. Set MEMCACHED_LOCATION (host:port) wherever the app is served.
+# Only the test runner, which runs in one process, may go without it.
+TESTING = (len(sys.argv) > 1 and sys.argv[1] == 'test') or 'pytest' in sys.modules
+
+if os.getenv('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('MEMCACHED_LOCATION'),
+        }
+    }
+elif TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    raise ImproperlyConfigured("MEMCACHED_LOCATION must be set to the host:port of the shared memcached server.")
+
+# Workers keep their own copy of the settings and pack tiers. They check the shared
+# cache for changes at most this often, and reload the copy at least this often.
+LOCAL_CACHE_CHECK_SECONDS = int(os.getenv('LOCAL_CACHE_CHECK_SECONDS', 5))
+LOCAL_CACHE_TIMEOUT_SECONDS = int(os.getenv('LOCAL_CACHE_TIMEOUT_SECONDS', 60))
+
+
 "-------------------- Auth User ---------------------------------------"
 AUTH_USER_MODEL = 'users.User'
 
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend', 
     'core.backend.EmailOrUsernameBackend',
 ]
 
+# Key for the permutation that turns the code sequence into referral and invitation codes.
+# Changing it after codes have been issued can produce duplicates.
+CODE_PERMUTATION_KEY = os.getenv('CODE_PERMUTATION_KEY', 'adsterra-codes')
+
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
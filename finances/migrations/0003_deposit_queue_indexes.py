@@ -0,0 +1,25 @@
+# Generated by Django 3.2.21 on 2026-10-17 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0002_paymentmethod_withdrawal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(fields=['status', '-date_time', '-id'], name='finances_deposit_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(fields=['user', '-date_time', '-id'], name='finances_deposit_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(fields=['-date_time', '-id'], name='finances_deposit_date_idx'),
+        ),
+    ]
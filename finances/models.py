@@ -2,7 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 import uuid
 from game.models import Game
-from django.utils.timezone import now, timedelta
+from shared.helpers import get_day_window
 User = get_user_model()
 
 class Deposit(models.Model):
@@ -31,6 +31,14 @@ class Deposit(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
 
+    class Meta:
+        indexes = [
+            # The admin deposit queue, filtered by status and/or user, newest first
+            models.Index(fields=['status', '-date_time', '-id'], name='finances_deposit_status_idx'),
+            models.Index(fields=['user', '-date_time', '-id'], name='finances_deposit_user_idx'),
+            models.Index(fields=['-date_time', '-id'], name='finances_deposit_date_idx'),
+        ]
+
     def __str__(self):
         return f"Deposit by {self.user.username} - {self.amount} USD - {self.status}"
 
@@ -112,13 +120,14 @@ class Withdrawal(models.Model):
         super(Withdrawal, self).save(*args, **kwargs)
 
     @classmethod
-    def can_withdraw(cls,user,amount,transactional_password):
+    def can_withdraw(cls,user,amount,transactional_password,wallet=None):
         """
         Check if the user can withdraw the specified amount.
+        Pass the wallet locked with select_for_update when it is debited afterwards.
         """
-        wallet = user.wallet
+        wallet = wallet or user.wallet
         balance = wallet.balance
-        pack = wallet.package
+        pack = wallet.cached_package
         number_of_play = Game.count_games_played_today(user)
         total_play = pack.daily_missions
         max_no_of_withdrawal = pack.daily_withdrawals
@@ -140,10 +149,9 @@ class Withdrawal(models.Model):
     @classmethod
     def total_count_of_today_withdrawal(cls,user):
         # Calculate the start and end of the current day
-        start_of_day = now().replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
+        start_of_day, end_of_day = get_day_window()
 
-        # Count games played by the user today
+        # Count withdrawals made by the user today
         return cls.objects.filter(
             user=user,
             created_at__gte=start_of_day,
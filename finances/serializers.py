@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Deposit,PaymentMethod,Withdrawal
 from django.contrib.auth  import get_user_model
+from wallet.models import Wallet
 
 User = get_user_model()
 
@@ -76,15 +77,18 @@ class WithdrawalSerializer:
             if not user.is_authenticated:
                 raise serializers.ValidationError("User is not authenticated.")
 
+            # Check and debit the wallet as it is now, locked until the withdrawal is saved,
+            # rather than the copy cached with the authenticated user
+            user_wallet = Wallet.objects.select_for_update().get(user_id=user.pk)
+
             # Call the can_withdraw method on the Withdrawal model
-            can_withdraw, error = Withdrawal.can_withdraw(user, data["amount"], data["password"])
+            can_withdraw, error = Withdrawal.can_withdraw(user, data["amount"], data["password"], wallet=user_wallet)
             
             if not can_withdraw:
                 raise serializers.ValidationError({"error":error})
             
-            user_wallet = user.wallet
-            if user_wallet:
-                user_wallet.debit(data['amount'])
+            user_wallet.debit(data['amount'])
+            self.wallet = user_wallet
 
             data.pop("password","")
             return data
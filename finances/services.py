@@ -0,0 +1,131 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils.timezone import now
+
+from notification.models import Notification
+from shared.helpers import get_settings
+from users.auth_cache import clear_cached_users
+from users.models import Invitation
+from wallet.models import Wallet
+from .models import Deposit
+
+CONFIRMED = "Confirmed"
+
+
+class DepositReviewService:
+    """
+    Service to move deposits to a new status and settle the wallets they affect.
+
+    Every deposit, wallet and invitation change of a review runs in one
+    transaction with a fixed number of statements, however many deposits
+    are reviewed, and balances are only changed with F() expressions.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.referral_percentage = Decimal(settings.percentage_of_sponsors if settings else 0)
+
+    def review(self, deposit_ids, status):
+        """
+        Set the status of the given deposits.
+        Confirming a deposit credits its amount and, for the user's first confirmed
+        deposit, the referral bonus of whoever invited them. Moving a deposit away
+        from Confirmed debits the amount again.
+        Returns a tuple: (reviewed deposits, ids that were not found or already had the status)
+        """
+        deposit_ids = list(dict.fromkeys(deposit_ids))
+        with transaction.atomic():
+            deposits = list(
+                Deposit.objects.select_for_update().filter(pk__in=deposit_ids).order_by('date_time', 'pk')
+            )
+            reviewed = [deposit for deposit in deposits if deposit.status != status]
+            reviewed_ids = {deposit.pk for deposit in reviewed}
+            skipped = [deposit_id for deposit_id in deposit_ids if deposit_id not in reviewed_ids]
+            if not reviewed:
+                return [], skipped
+
+            balance_deltas = defaultdict(Decimal)
+            confirmed = {}
+            for deposit in reviewed:
+                if status == CONFIRMED:
+                    balance_deltas[deposit.user_id] += deposit.amount
+                    # The referral bonus is paid on the earliest deposit confirmed
+                    confirmed.setdefault(deposit.user_id, deposit)
+                elif deposit.status == CONFIRMED:
+                    balance_deltas[deposit.user_id] -= deposit.amount
+
+            bonuses = self.apply_referral_bonuses(confirmed, balance_deltas)
+
+            updated_at = now()
+            Deposit.objects.filter(pk__in=reviewed_ids).update(status=status, updated_at=updated_at)
+            for deposit in reviewed:
+                deposit.status = status
+                deposit.updated_at = updated_at
+
+            self.settle_wallets(balance_deltas)
+            self.notify_referrers(bonuses)
+
+        return reviewed, skipped
+
+    def apply_referral_bonuses(self, confirmed, balance_deltas):
+        """
+        Credit the referrers of users whose first deposit is being confirmed,
+        and mark their invitations as paid. Returns a list of (referrer id, bonus).
+        """
+        if not confirmed or not self.referral_percentage:
+            return []
+
+        invitations = list(
+            Invitation.objects.select_for_update().filter(user_id__in=list(confirmed), received_bonus=False)
+        )
+        bonuses = []
+        for invitation in invitations:
+            bonus = (confirmed[invitation.user_id].amount * self.referral_percentage / 100).quantize(Decimal("0.01"))
+            balance_deltas[invitation.referral_id] += bonus
+            bonuses.append((invitation.referral_id, bonus))
+        Invitation.objects.filter(pk__in=[invitation.pk for invitation in invitations]).update(received_bonus=True)
+        return bonuses
+
+    def settle_wallets(self, balance_deltas):
+        """
+        Apply every balance change in one UPDATE, then re-tier the same wallets
+        in one more, leaving wallets with a pending game on their current pack.
+        """
+        balance_deltas = {user_id: delta for user_id, delta in balance_deltas.items() if delta}
+        if not balance_deltas:
+            return
+
+        wallets = Wallet.objects.filter(user_id__in=list(balance_deltas))
+        wallets.update(
+            balance=F('balance') + Case(
+                *[When(user_id=user_id, then=Value(delta)) for user_id, delta in balance_deltas.items()],
+                default=Value(Decimal("0.00")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            updated_at=now(),
+        )
+
+        Wallet.retier(list(balance_deltas))
+        clear_cached_users(list(balance_deltas))
+
+    def notify_referrers(self, bonuses):
+        """
+        Tell the referrers about their bonus and new balance, with one read and one insert.
+        """
+        if not bonuses:
+            return
+        balances = dict(
+            Wallet.objects.filter(user_id__in=[referrer_id for referrer_id, _ in bonuses]).values_list('user_id', 'balance')
+        )
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=referrer_id,
+                title="Referral Bonus",
+                message=f"You have recieved a referral bonus of {bonus:.2f}, Your current balance is {balances.get(referrer_id)}",
+                type=Notification.USER,
+            )
+            for referrer_id, bonus in bonuses
+        ])
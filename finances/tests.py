@@ -1,3 +1,49 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from shared.testing import CacheResetTestCase, create_pack, create_settings, create_user
+from wallet.models import Wallet
+from .models import PaymentMethod, Withdrawal
+
+
+class MakeWithdrawalTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_settings()
+        cls.pack = create_pack(daily_missions=0, daily_withdrawals=5)
+        cls.user = create_user("withdrawer")
+        PaymentMethod.objects.create(user=cls.user, name="USDT", wallet="address")
+
+    def setUp(self):
+        super().setUp()
+        Wallet.objects.filter(user=self.user).update(balance=Decimal("100.00"), package=self.pack)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        # Authenticate once so the user and wallet are cached
+        self.client.get("/api/withdrawals/withdrawal_history/")
+
+    def withdraw(self, amount):
+        return self.client.post(
+            "/api/withdrawals/make_withdrawal/", {"amount": amount, "password": "1234"}, format="json"
+        )
+
+    def test_withdrawal_is_checked_against_the_current_wallet_not_the_cached_one(self):
+        # A change that didn't go through this worker's cache
+        Wallet.objects.filter(user=self.user).update(balance=Decimal("30.00"))
+
+        self.assertEqual(self.withdraw("50.00").status_code, 400)
+        self.assertFalse(Withdrawal.objects.exists())
+
+    def test_withdrawal_debits_the_current_wallet_without_overwriting_other_fields(self):
+        Wallet.objects.filter(user=self.user).update(balance=Decimal("80.00"), commission=Decimal("7.00"))
+
+        response = self.withdraw("50.00")
+
+        self.assertEqual(response.status_code, 201)
+        wallet = Wallet.objects.get(user=self.user)
+        self.assertEqual(wallet.balance, Decimal("30.00"))
+        self.assertEqual(wallet.commission, Decimal("7.00"))
+        self.assertEqual(Withdrawal.objects.get().amount, Decimal("50.00"))
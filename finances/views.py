@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework.viewsets import ViewSet
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -31,15 +32,9 @@ class DepositViewSet(StandardResponseMixin, ViewSet):
             return Response([], status=status.HTTP_200_OK)
         
         user = request.user
-        deposits = Deposit.objects.filter(user=user).order_by('-date_time')  # Regular user: Their deposits
+        deposits = Deposit.objects.filter(user=user)  # Regular user: Their deposits
 
-        serializer = DepositSerializer(deposits, many=True)
-        return self.standard_response(
-            success=True,
-            message="Deposits retrieved successfully.", 
-            data=serializer.data,
-            status_code=status.HTTP_200_OK,
-        )
+        return self.keyset_paginated_response(deposits, DepositSerializer, '-date_time')
 
     @swagger_auto_schema(
         operation_description="Create a deposit for the authenticated user.",
@@ -226,16 +221,17 @@ class WithdrawalViewSet(StandardResponseMixin, ViewSet):
         Handle withdrawal requests.
         """
         serializer = WithdrawalSerializer.MakeWithdrawal(data=request.data, context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        # Process the withdrawal logic here
-        amount = serializer.validated_data['amount']
-        
-        # Assuming the user has a `payment_method` attribute
-        payment_method = request.user.payment_method
-
-        # Create the withdrawal record
-        Withdrawal.objects.create(user=request.user, amount=amount, payment_method=payment_method)
-        message = f"You made a withdrawal request of  {serializer.validated_data['amount']} USD, New Balance : {request.user.wallet.balance} USD"
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            # Process the withdrawal logic here
+            amount = serializer.validated_data['amount']
+            
+            # Assuming the user has a `payment_method` attribute
+            payment_method = request.user.payment_method
+
+            # Create the withdrawal record
+            Withdrawal.objects.create(user=request.user, amount=amount, payment_method=payment_method)
+        message = f"You made a withdrawal request of  {serializer.validated_data['amount']} USD, New Balance : {serializer.wallet.balance} USD"
         create_user_notification(
             user=request.user,
             title="Withdrawal",
@@ -255,10 +251,4 @@ class WithdrawalViewSet(StandardResponseMixin, ViewSet):
         Retrieve the withdrawal history for the authenticated user.
         """
         withdrawals = Withdrawal.objects.filter(user=request.user)
-        serializer = WithdrawalSerializer.ListWithdrawals(withdrawals, many=True)
-        return self.standard_response(
-            success=True,
-            message="Withdrawal History Fetched succesfully.",
-            data=serializer.data,
-            status_code=status.HTTP_201_CREATED,
-        )
\ No newline at end of file
+        return self.keyset_paginated_response(withdrawals, WithdrawalSerializer.ListWithdrawals, '-created_at')
\ No newline at end of file
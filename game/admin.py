@@ -1,6 +1,19 @@
+from django import forms
 from django.contrib import admin
 from .models import Product,Game
 
+
+class GameAdminForm(forms.ModelForm):
+    class Meta:
+        model = Game
+        fields = '__all__'
+
+    def clean_products(self):
+        products = self.cleaned_data['products']
+        if len(products) > Game.MAX_PRODUCTS:
+            raise forms.ValidationError(f"A game cannot have more than {Game.MAX_PRODUCTS} products.")
+        return products
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'price', 'rating_no', 'date_created')
@@ -12,15 +25,10 @@ class ProductAdmin(admin.ModelAdmin):
 
 @admin.register(Game)
 class GameAdmin(admin.ModelAdmin):
+    form = GameAdminForm
     list_display = ('id', 'user', 'rating_score', 'played', 'pending', 'special_product', 'created_at', 'updated_at')
     search_fields = ('user__username', 'rating_no')
     list_filter = ('played', 'special_product', 'pending', 'created_at')
     readonly_fields = ('rating_no', 'created_at', 'updated_at')
     ordering = ('-created_at',)
     filter_horizontal = ('products',)  # To manage many-to-many relationships in the admin UI
-
-    def save_model(self, request, obj, form, change):
-        # Custom save logic (if needed)
-        if obj.products.count() > 3:
-            raise ValueError("A game cannot have more than 3 products.")
-        super().save_model(request, obj, form, change)
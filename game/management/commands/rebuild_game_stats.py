@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from game.models import UserGameStats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's game stats row from their games, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Users recomputed per transaction.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        rebuilt = 0
+        last_id = 0
+        while True:
+            user_ids = list(
+                User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+            rebuilt += UserGameStats.rebuild(user_ids)
+            last_id = user_ids[-1]
+            self.stdout.write(f"{rebuilt} users rebuilt...")
+        self.stdout.write(self.style.SUCCESS(f"Game stats rebuilt for {rebuilt} users."))
@@ -0,0 +1,65 @@
+# Generated by Django 3.2.21 on 2026-10-17 06:04
+
+from datetime import datetime, time, timedelta
+
+import pytz
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.timezone import localdate
+import django.db.models.deletion
+
+
+def backfill_today(apps, schema_editor):
+    """
+    Seed today's counters from the games already played today, so the daily quota
+    still holds on the day this is deployed. Like the count it replaces, a game
+    belongs to the day it was created on, in the operator's timezone.
+    """
+    Settings = apps.get_model('administration', 'Settings')
+    Game = apps.get_model('game', 'Game')
+    DailyGameStats = apps.get_model('game', 'DailyGameStats')
+
+    operator_settings = Settings.objects.first()
+    try:
+        tz = pytz.timezone(operator_settings.timezone if operator_settings else settings.TIME_ZONE)
+    except pytz.UnknownTimeZoneError:
+        tz = pytz.timezone(settings.TIME_ZONE)
+    today = localdate(timezone=tz)
+    start_of_day = tz.localize(datetime.combine(today, time.min))
+    end_of_day = tz.localize(datetime.combine(today + timedelta(days=1), time.min))
+
+    counts = Game.objects.filter(
+        played=True,
+        is_active=True,
+        created_at__gte=start_of_day,
+        created_at__lt=end_of_day,
+    ).values('user').annotate(games_played=models.Count('id')).order_by()
+    DailyGameStats.objects.bulk_create(
+        [DailyGameStats(user_id=row['user'], date=today, games_played=row['games_played']) for row in counts],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('administration', '0001_initial'),
+        ('game', '0011_alter_game_rating_no'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyGameStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_game_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_today, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.21 on 2026-10-17 06:09
+
+from django.db import migrations, models
+
+
+def create_rating_no_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE SEQUENCE IF NOT EXISTS game_rating_no_block_seq')
+
+
+def drop_rating_no_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP SEQUENCE IF EXISTS game_rating_no_block_seq')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0012_dailygamestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_block', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_rating_no_sequence, drop_rating_no_sequence),
+    ]
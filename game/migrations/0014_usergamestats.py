@@ -0,0 +1,61 @@
+# Generated by Django 3.2.21 on 2026-10-17 06:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_game_stats(apps, schema_editor):
+    """
+    Create the stats row of every existing user from their games, in chunks.
+    """
+    User = apps.get_model('users', 'User')
+    Game = apps.get_model('game', 'Game')
+    UserGameStats = apps.get_model('game', 'UserGameStats')
+
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(user_ids), 1000):
+        chunk = user_ids[start:start + 1000]
+        totals = {
+            row['user']: row
+            for row in Game.objects.filter(user_id__in=chunk).values('user').annotate(
+                games_played=models.Count('id', filter=models.Q(played=True)),
+                special_games_played=models.Count('id', filter=models.Q(played=True, special_product=True)),
+                pending_games=models.Count('id', filter=models.Q(played=False, pending=True)),
+                total_commission=models.Sum('commission', filter=models.Q(played=True)),
+                last_played_at=models.Max('updated_at', filter=models.Q(played=True)),
+            ).order_by()
+        }
+        UserGameStats.objects.bulk_create([
+            UserGameStats(
+                user_id=user_id,
+                games_played=totals.get(user_id, {}).get('games_played', 0),
+                special_games_played=totals.get(user_id, {}).get('special_games_played', 0),
+                pending_games=totals.get(user_id, {}).get('pending_games', 0),
+                total_commission=totals.get(user_id, {}).get('total_commission') or 0,
+                last_played_at=totals.get(user_id, {}).get('last_played_at'),
+            )
+            for user_id in chunk
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_unique_codes'),
+        ('game', '0013_ratingnumbersequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserGameStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='game_stats', serialize=False, to='users.user')),
+                ('games_played', models.PositiveIntegerField(db_index=True, default=0)),
+                ('special_games_played', models.PositiveIntegerField(db_index=True, default=0)),
+                ('pending_games', models.PositiveIntegerField(db_index=True, default=0)),
+                ('total_commission', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=14)),
+                ('last_played_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_game_stats, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,11 @@
-import random
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
-from django.utils.timezone import now, timedelta
+from django.utils.timezone import now
 # from wallet.models import OnHoldPay
 from django.core.validators import MinValueValidator
+from shared.helpers import get_today
+from .rating_numbers import rating_number_allocator
 
 User = get_user_model()
 
@@ -12,10 +14,21 @@ def generate_unique_rating_no():
     """
     Generate a unique 11-digit number for rating_no.
     """
-    while True:
-        rating_no = ''.join([str(random.randint(0, 9)) for _ in range(11)])
-        if not Product.objects.filter(rating_no=rating_no).exists():
-            return rating_no
+    return rating_number_allocator.allocate(1)[0]
+
+
+def generate_unique_rating_nos(count):
+    """
+    Generate `count` unique 11-digit rating numbers.
+    """
+    return rating_number_allocator.allocate(count)
+
+
+class RatingNumberSequence(models.Model):
+    """
+    Block counter backing the rating number allocator on databases without sequences.
+    """
+    next_block = models.BigIntegerField(default=0)
 
 
 class Product(models.Model):
@@ -60,37 +73,43 @@ class Game(models.Model):
         help_text="Reference to the on-hold payment associated with this game."
         )
     
+    # Enforced when products are assigned, by the m2m_changed guard in game.signals
+    MAX_PRODUCTS = 3
+
     class Meta:
         ordering = ['-created_at']
         
     def save(self, *args, **kwargs):
         """
-        Override save method to enforce a maximum of 3 products per game.
+        Override save method to assign a rating number to new games.
         """
-        super().save(*args, **kwargs)
         if not self.rating_no:
             self.rating_no = generate_unique_rating_no()
-        if self.products.count() > 3:
-            raise ValueError("A game cannot have more than 3 products.")
+        super().save(*args, **kwargs)
 
     @classmethod
     def count_games_played_today(cls, user):
         """
         Count the number of games a user has played today.
+        Reads the user's DailyGameStats counter instead of counting Game rows.
         """
-        # Calculate the start and end of the current day
-        start_of_day = now().replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
-
-        # Count games played by the user today
-        return cls.objects.filter(
-            user=user,
-            played=True,  # Ensure we only count played games
-            is_active=True,
-            created_at__gte=start_of_day,
-            created_at__lt=end_of_day
-        ).count()
+        return DailyGameStats.games_played_today(user)
     
+    @classmethod
+    def replace_pregenerated_game(cls, special_game):
+        """
+        Deactivate the user's unplayed pre-generated game in the slot of a special game
+        configured after the day's games were generated, so the special game takes its place.
+        """
+        cls.objects.filter(
+            user_id=special_game.user_id,
+            game_number=special_game.game_number,
+            special_product=False,
+            played=False,
+            pending=False,
+            is_active=True,
+        ).update(is_active=False, updated_at=now())
+
     @classmethod
     def user_has_pending_game(cls,user):
         '''
@@ -102,6 +121,141 @@ class Game(models.Model):
         return f"Game Review: {self.products.name if self.products else 'product'} by {self.user.username}"
 
 
+
+class DailyGameStats(models.Model):
+    """
+    Per-user, per-day counter of played games, maintained when a game is played.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_game_stats")
+    date = models.DateField()
+    games_played = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date')
+
+    @classmethod
+    def games_played_today(cls, user):
+        """
+        Return the number of games the user has played today.
+        """
+        return cls.objects.filter(user=user, date=get_today()).values_list('games_played', flat=True).first() or 0
+
+    @classmethod
+    def record_game_played(cls, user, played_today=None):
+        """
+        Increment today's counter for the user.
+        Must run in the transaction that marks the game as played, with the user's wallet locked.
+        `played_today` is the count the caller already read, used to skip the UPDATE for the first game of the day.
+        """
+        today = get_today()
+        if played_today != 0:
+            if cls.objects.filter(user=user, date=today).update(games_played=F('games_played') + 1):
+                return
+        cls.objects.create(user=user, date=today, games_played=1)
+
+    def __str__(self):
+        return f"{self.user} played {self.games_played} games on {self.date}"
+
+
+class UserGameStats(models.Model):
+    """
+    Per-user lifetime game totals, maintained when a game is played or put on hold,
+    so the admin user list can sort and filter on indexed columns instead of
+    aggregating the Game table. `rebuild_game_stats` recomputes them from the games.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="game_stats")
+    games_played = models.PositiveIntegerField(default=0, db_index=True)
+    special_games_played = models.PositiveIntegerField(default=0, db_index=True)
+    pending_games = models.PositiveIntegerField(default=0, db_index=True)
+    total_commission = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_index=True)
+    last_played_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    @classmethod
+    def _apply(cls, user, **changes):
+        """
+        Apply F() expression updates to the user's row, creating it for users that predate the table.
+        Must run in the transaction that changes the game, with the user's wallet locked.
+        """
+        user_id = getattr(user, 'pk', user)
+        if not cls.objects.filter(user_id=user_id).update(**changes):
+            cls.objects.create(user_id=user_id)
+            cls.objects.filter(user_id=user_id).update(**changes)
+
+    @classmethod
+    def record_game_played(cls, game):
+        """
+        Count a game that has just been played. Call before clearing `game.pending`.
+        """
+        changes = {
+            'games_played': F('games_played') + 1,
+            'total_commission': F('total_commission') + (game.commission or 0),
+            'last_played_at': now(),
+        }
+        if game.special_product:
+            changes['special_games_played'] = F('special_games_played') + 1
+        if game.pending:
+            changes['pending_games'] = F('pending_games') - 1
+        cls._apply(game.user_id, **changes)
+
+    @classmethod
+    def record_game_pending(cls, game):
+        """
+        Count a game that has just been put on hold.
+        """
+        cls._apply(game.user_id, pending_games=F('pending_games') + 1)
+
+    @classmethod
+    def record_game_deleted(cls, game):
+        """
+        Remove a deleted game from the totals. Called for every deleted game by a post_delete signal.
+        A user without a row, such as one being deleted, has nothing to remove.
+        """
+        changes = {}
+        if game.played:
+            changes['games_played'] = F('games_played') - 1
+            changes['total_commission'] = F('total_commission') - (game.commission or 0)
+            if game.special_product:
+                changes['special_games_played'] = F('special_games_played') - 1
+        elif game.pending:
+            changes['pending_games'] = F('pending_games') - 1
+        if changes:
+            cls.objects.filter(user_id=game.user_id).update(**changes)
+
+    @classmethod
+    def rebuild(cls, user_ids):
+        """
+        Recompute the rows of the given users from their games with one aggregate query.
+        """
+        totals = {
+            row['user']: row
+            for row in Game.objects.filter(user_id__in=user_ids).values('user').annotate(
+                games_played=models.Count('id', filter=models.Q(played=True)),
+                special_games_played=models.Count('id', filter=models.Q(played=True, special_product=True)),
+                pending_games=models.Count('id', filter=models.Q(played=False, pending=True)),
+                total_commission=models.Sum('commission', filter=models.Q(played=True)),
+                last_played_at=models.Max('updated_at', filter=models.Q(played=True)),
+            ).order_by()
+        }
+        rows = []
+        for user_id in user_ids:
+            total = totals.get(user_id, {})
+            rows.append(cls(
+                user_id=user_id,
+                games_played=total.get('games_played', 0),
+                special_games_played=total.get('special_games_played', 0),
+                pending_games=total.get('pending_games', 0),
+                total_commission=total.get('total_commission') or 0,
+                last_played_at=total.get('last_played_at'),
+            ))
+        with transaction.atomic():
+            cls.objects.filter(user_id__in=user_ids).delete()
+            cls.objects.bulk_create(rows)
+        return len(rows)
+
+    def __str__(self):
+        return f"{self.user} played {self.games_played} games"
+
+
 # class NegativeUser(models.Model):
 #     user = models.OneToOneField(
 #         User, 
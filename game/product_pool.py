@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from .models import Product
+
+PRODUCT_POOL_CACHE_KEY = "game:product_pool"
+
+# Safety net for workers that miss an invalidation; Product signals clear the pool immediately.
+PRODUCT_POOL_TIMEOUT_SECONDS = 300
+
+
+def get_product_pool():
+    """
+    Return the candidate products for new games as a list of (id, price) tuples.
+    The list is cached and rebuilt with a single narrow query when missing.
+    """
+    pool = cache.get(PRODUCT_POOL_CACHE_KEY)
+    if pool is None:
+        pool = list(Product.objects.order_by('id').values_list('id', 'price'))
+        cache.set(PRODUCT_POOL_CACHE_KEY, pool, PRODUCT_POOL_TIMEOUT_SECONDS)
+    return pool
+
+
+def find_missing_products(product_ids):
+    """
+    Return the ids among `product_ids` whose products no longer exist, with one query.
+    A worker can still hold a deleted product in its pool, so drawn products are checked
+    before games are linked to them. The pool is dropped when any is missing.
+    """
+    product_ids = set(product_ids)
+    missing = product_ids - set(Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True))
+    if missing:
+        clear_product_pool()
+    return missing
+
+
+def clear_product_pool():
+    """
+    Drop the cached pool so the next game assignment rebuilds it.
+    """
+    cache.delete(PRODUCT_POOL_CACHE_KEY)
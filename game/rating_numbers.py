@@ -0,0 +1,115 @@
+import hashlib
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+# Rating numbers are 11 digits, so the permutation works over [0, 10**11).
+RATING_NO_DIGITS = 11
+RATING_NO_DOMAIN = 10 ** RATING_NO_DIGITS
+
+# The Feistel network permutes 38-bit values (2**38 > 10**11) and cycle-walks
+# back into the domain, which keeps it a bijection on [0, 10**11).
+HALF_BITS = 19
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+
+# Sequence values reserved per round trip. Never change this once numbers have
+# been issued: the database sequence counts blocks of this size.
+RATING_NO_BLOCK_SIZE = 1000
+RATING_NO_SEQUENCE = "game_rating_no_block_seq"
+
+
+def _round(value, round_index, key):
+    digest = hashlib.blake2b(
+        value.to_bytes(4, "big"),
+        digest_size=4,
+        key=key,
+        person=round_index.to_bytes(1, "big") * 16,
+    ).digest()
+    return int.from_bytes(digest, "big") & HALF_MASK
+
+
+def permute(value, key):
+    """
+    Map a counter value in [0, 10**11) to a unique, random-looking value in the same range.
+    """
+    if not 0 <= value < RATING_NO_DOMAIN:
+        raise ValueError("Rating number counter is out of range.")
+    while True:
+        left, right = value >> HALF_BITS, value & HALF_MASK
+        for round_index in range(ROUNDS):
+            left, right = right, left ^ _round(right, round_index, key)
+        value = (left << HALF_BITS) | right
+        if value < RATING_NO_DOMAIN:
+            return value
+
+
+def unpermute(value, key):
+    """
+    Inverse of `permute`.
+    """
+    if not 0 <= value < RATING_NO_DOMAIN:
+        raise ValueError("Rating number is out of range.")
+    while True:
+        left, right = value >> HALF_BITS, value & HALF_MASK
+        for round_index in reversed(range(ROUNDS)):
+            left, right = right ^ _round(left, round_index, key), left
+        value = (left << HALF_BITS) | right
+        if value < RATING_NO_DOMAIN:
+            return value
+
+
+def reserve_block():
+    """
+    Reserve the next block of counter values and return its first value.
+    PostgreSQL uses a sequence, which is not rolled back with the caller's
+    transaction. Other backends fall back to the RatingNumberSequence row,
+    where a rolled-back caller can see its block reissued.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s)", [RATING_NO_SEQUENCE])
+            block = cursor.fetchone()[0] - 1
+    else:
+        RatingNumberSequence = apps.get_model("game", "RatingNumberSequence")
+        with transaction.atomic():
+            sequence, _ = RatingNumberSequence.objects.select_for_update().get_or_create(pk=1)
+            block = sequence.next_block
+            RatingNumberSequence.objects.filter(pk=1).update(next_block=F("next_block") + 1)
+    return block * RATING_NO_BLOCK_SIZE
+
+
+class RatingNumberAllocator:
+    """
+    Hands out unique 11-digit rating numbers without a query per number.
+    Each worker reserves a block of counter values at a time and maps every
+    value through a keyed Feistel permutation, so numbers never collide and
+    don't reveal their issue order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def allocate(self, count=1):
+        """
+        Return a list of `count` unique rating numbers as zero-padded strings.
+        """
+        key = settings.RATING_NO_PERMUTATION_KEY.encode()[:64]
+        values = []
+        with self._lock:
+            while len(values) < count:
+                if self._next >= self._end:
+                    self._next = reserve_block()
+                    self._end = self._next + RATING_NO_BLOCK_SIZE
+                take = min(count - len(values), self._end - self._next)
+                values.extend(range(self._next, self._next + take))
+                self._next += take
+        return [str(permute(value, key)).zfill(RATING_NO_DIGITS) for value in values]
+
+
+rating_number_allocator = RatingNumberAllocator()
@@ -145,7 +145,7 @@ class AdminNegativeUserSerializer:
         def save(self):
             """Create or update a negative game for the user"""
             user = self.validated_data['user']
-            profit_percentage = user.wallet.package.profit_percentage
+            profit_percentage = user.wallet.cached_package.profit_percentage
             on_hold = self.validated_data['on_hold']
             number_of_negative_product = self.validated_data.get('number_of_negative_product', self.instance.products.count() if self.instance else 0)
             rank_appearance = self.validated_data.get('rank_appearance', self.instance.game_number if self.instance else None)
@@ -171,6 +171,7 @@ class AdminNegativeUserSerializer:
                 self.instance.is_active = True
                 self.instance.products.set(products)
                 self.instance.save()
+                Game.replace_pregenerated_game(self.instance)
                 return self.instance
             else:
                 # Create a new instance
@@ -185,6 +186,7 @@ class AdminNegativeUserSerializer:
                     is_active=True,
                 )
                 game.products.set(products)
+                Game.replace_pregenerated_game(game)
                 return game
 
 
@@ -201,8 +203,10 @@ class AdminNegativeUserSerializer:
             ref_name = "Negative User List"
 
         def get_number_of_negative_product(self,obj):
-            number_of_negative_product = obj.products.count()
-            return number_of_negative_product
+            number_of_negative_product = getattr(obj, 'product_count', None)
+            if number_of_negative_product is not None:
+                return number_of_negative_product
+            return obj.products.count()
 
         def get_rank_appearance(self,obj):
             return obj.game_number
\ No newline at end of file
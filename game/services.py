@@ -1,7 +1,14 @@
-from django.utils.timezone import now, timedelta
-from .models import Game, Product,generate_unique_rating_no
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.utils.timezone import now
+from .models import Game, DailyGameStats, UserGameStats, generate_unique_rating_no, generate_unique_rating_nos
+from .product_pool import find_missing_products, get_product_pool
 import random
-from shared.helpers import get_settings
+from shared.helpers import get_settings, get_day_window
+from wallet.models import Wallet
+from administration.models import DashboardRollup
 
 
 class PlayGameService:
@@ -14,6 +21,16 @@ class PlayGameService:
         self.total_number_can_play = total_number_can_play
         self.wallet = wallet
         self.settings = get_settings()
+        self.wallet_locked = False
+        self._games_played_today = None
+
+    def games_played_today(self):
+        """
+        Number of games the user has played today, counted once per service instance.
+        """
+        if self._games_played_today is None:
+            self._games_played_today = Game.count_games_played_today(self.user)
+        return self._games_played_today
 
     def check_can_user_play(self):
         """
@@ -26,10 +43,10 @@ class PlayGameService:
             min_balance = getattr(self.settings, 'minimum_balance_for_submissions', 100)
             if self.wallet.balance < min_balance:
                 return False, f"You need a minimum of {min_balance} USD balance to make a submission."
-        if Game.count_games_played_today(self.user) >= self.total_number_can_play:
+        if self.games_played_today() >= self.total_number_can_play:
             return False, "You have reached the maximum number of submissions you can make today, upgrade you package"
         return True, ""
-    
+
     def check_can_user_play_pending_game(self):
         """
         Check if the user is eligible to play a pending game.
@@ -37,95 +54,203 @@ class PlayGameService:
         """
         if self.wallet.on_hold != 0:
             return False, "You have a pending transaction, please clear it to proceed."
-        if Game.count_games_played_today(self.user) >= self.total_number_can_play:
+        if self.games_played_today() >= self.total_number_can_play:
             return False, "You have reached the maximum number of submissions you can make today, upgrade you package"
         return True, ""
 
-    def get_active_game(self):
+    def lock_wallet(self):
+        """
+        Reload the wallet with a row lock. Must be called inside a transaction.
+        """
+        self.wallet = Wallet.objects.select_for_update().get(pk=self.wallet.pk)
+        self.wallet_locked = True
+
+    def get_unplayed_games(self, lock=False):
+        """
+        Fetch all of the user's active, unplayed games in one query.
+        With `lock=True` the rows are locked until the surrounding transaction ends.
+        """
+        queryset = Game.objects.filter(user=self.user, played=False, is_active=True)
+        if lock:
+            queryset = queryset.select_for_update()
+        return list(queryset)
+
+    def retire_stale_games(self, unplayed_games):
+        """
+        Deactivate the unplayed games pre-generated before today, whose products,
+        prices and slot numbers belong to an earlier day, so the first request of
+        the day generates a fresh quota. Pending and special games are kept.
+        Returns the remaining unplayed games.
+        """
+        start_of_day, _ = get_day_window()
+        stale_ids = [
+            game.pk for game in unplayed_games
+            if game.game_number is not None and not game.special_product
+            and not game.pending and game.created_at < start_of_day
+        ]
+        if not stale_ids:
+            return unplayed_games
+        Game.objects.filter(pk__in=stale_ids, played=False, pending=False).update(is_active=False, updated_at=now())
+        return [game for game in unplayed_games if game.pk not in stale_ids]
+
+    def pick_active_game(self, unplayed_games):
+        """
+        Pick the game the user should play next from their unplayed games:
+        a pending game first, then the special game ranked for the next
+        submission, then a pre-generated game for that slot, then the most
+        recent unplayed game.
+        """
+        for game in unplayed_games:
+            if game.pending:
+                return game
+        next_game_number = self.games_played_today() + 1
+        for game in unplayed_games:
+            if game.special_product and game.game_number == next_game_number:
+                return game
+        for game in unplayed_games:
+            if game.game_number == next_game_number:
+                return game
+        return unplayed_games[0] if unplayed_games else None
+
+    def get_active_game(self, unplayed_games=None):
         """
         Retrieve the user's active game.
         Returns a tuple: (game: Game or None, error: str)
         """
-        pending_game = Game.objects.filter(user=self.user, played=False,pending=True,is_active=True).first()
-        if pending_game:
-            return pending_game,""
-        special_game = Game.objects.filter(user=self.user, played=False,special_product=True,game_number=(Game.count_games_played_today(self.user)+1),is_active=True).first()
-        if special_game:
-            return special_game,""
-        active_game = Game.objects.filter(user=self.user, played=False,is_active=True).first()
+        if unplayed_games is None:
+            unplayed_games = self.get_unplayed_games()
+        unplayed_games = self.retire_stale_games(unplayed_games)
+
+        active_game = self.pick_active_game(unplayed_games)
         if active_game:
             return active_game, ""
 
+        if not self.wallet_locked:
+            # Serialise game creation with concurrent requests from the same user
+            with transaction.atomic():
+                self.lock_wallet()
+                try:
+                    return self.get_active_game(self.get_unplayed_games(lock=True))
+                finally:
+                    self.wallet_locked = False
+
         # If no active game exists, try to assign a new one
+        if getattr(django_settings, 'GAME_PREGENERATE_DAILY_GAMES', False):
+            return self.pregenerate_daily_games(unplayed_games)
         return self.assign_next_game()
 
     def mark_game_as_played(self, game, rating_score, comment):
         """
         Mark the current active game as played and update it with a rating and comment.
+        The wallet is settled with a single UPDATE, so `self.wallet` must be locked.
+        Regular games pay the commission of the pack the wallet is on now, which may
+        have changed since the game was generated; special games keep the one set for them.
         """
         amount = game.amount
-        commission = game.commission
-
-        if game.pending:
-            self.wallet.credit(amount + commission)
-            self.wallet.credit_commission(commission)
-        else:
-            if self.wallet.balance < amount and game.special_product:
-                game.pending = True
-                game.save()
-                self.wallet.on_hold = self.wallet.balance - amount
-                self.wallet.balance = 0
-                self.wallet.save()
-                return False, "Insufficient balance to make this submission."
-
-            self.wallet.debit(amount)
-            self.wallet.credit(amount + commission)
-            self.wallet.credit_commission(commission)
-
+        commission = game.commission if game.special_product else self.get_commission(amount)
+
+        if not game.pending and game.special_product and self.wallet.balance < amount:
+            Game.objects.filter(pk=game.pk).update(pending=True, updated_at=now())
+            game.pending = True
+            UserGameStats.record_game_pending(game)
+            DashboardRollup.record(submissions=1)
+            self.wallet.settle(
+                balance_delta=-self.wallet.balance,
+                on_hold=self.wallet.balance - amount,
+                update_pack=False,
+            )
+            return False, "Insufficient balance to make this submission."
+
+        # A pending game was already debited when it was put on hold, so only the
+        # payout is credited. Otherwise the debit and credit of `amount` cancel out,
+        # also for a regular game worth more than the balance: the shortfall the
+        # debit would put on hold is released again by the credit.
+        balance_delta = amount + commission if game.pending else commission
+        self.wallet.settle(balance_delta=balance_delta, commission_delta=commission)
+
+        Game.objects.filter(pk=game.pk).update(
+            rating_score=rating_score,
+            comment=comment,
+            commission=commission,
+            played=True,
+            pending=False,
+            updated_at=now(),
+        )
+        game.commission = commission
+        UserGameStats.record_game_played(game)
+        DashboardRollup.record_game_submitted(game)
         game.rating_score = rating_score
         game.comment = comment
         game.played = True
         game.pending = False
-        game.save()
+        DailyGameStats.record_game_played(self.user, self.games_played_today())
+        self._games_played_today = self.games_played_today() + 1
 
         return True, ""
 
 
+    def get_available_products(self):
+        """
+        Return the (id, price) pairs of the products the user hasn't played today.
+        """
+        start_of_day, end_of_day = get_day_window()
+
+        # Get all products the user has played today
+        played_products_today = set(Game.products.through.objects.filter(
+            game__user=self.user,
+            game__is_active=True,
+            game__created_at__gte=start_of_day,
+            game__created_at__lt=end_of_day
+        ).values_list('product_id', flat=True))
+
+        # Get products the user hasn't played today, as (id, price) pairs
+        return [
+            product for product in get_product_pool() if product[0] not in played_products_today
+        ]
+
+    def get_commission(self, amount):
+        """
+        Calculate the commission on an amount at the profit percentage of the wallet's pack.
+        """
+        package = self.wallet.cached_package
+        if package:
+            commission_percentage = package.profit_percentage
+        else:
+            commission_percentage = Decimal("0.5")  # Default to 20% if no package is available
+
+        return ((amount * commission_percentage) / 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    def get_amount_and_commission(self, selected_products):
+        """
+        Calculate the game amount and commission for the selected (id, price) pairs.
+        """
+        total_amount = sum(price for _, price in selected_products)
+        return total_amount, self.get_commission(total_amount)
+
     def assign_next_game(self):
         """
         Assign the next game for the user with one or two products they haven't played today.
         Set the game amount and commission based on the selected products.
         Returns a tuple: (game: Game or None, message: str)
         """
-        start_of_day = now().replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
+        available_products = self.get_available_products()
 
-        # Get all products the user has played today
-        played_products_today = Game.objects.filter(
-            user=self.user,
-            is_active=True,
-            created_at__gte=start_of_day,
-            created_at__lt=end_of_day
-        ).values_list('products__id', flat=True)
-
-        # Get products the user hasn't played today
-        available_products = Product.objects.exclude(id__in=played_products_today)
+        while True:
+            if not available_products:
+                return None, "No new submission available for you. Check back later"
 
-        if not available_products.exists():
-            return None, "No new submission available for you. Check back later"
+            # Randomly select 1 or 2 products from the available list
+            product_count = random.choice([1, 2])
+            selected_products = random.sample(available_products, min(product_count, len(available_products)))
 
-        # Randomly select 1 or 2 products from the available list
-        product_count = random.choice([1, 2])
-        selected_products = random.sample(list(available_products), min(product_count, len(available_products)))
+            # Draw again without the products deleted since the pool was cached
+            missing = find_missing_products([product_id for product_id, _ in selected_products])
+            if not missing:
+                break
+            available_products = [product for product in available_products if product[0] not in missing]
 
         # Calculate the total amount and commission
-        total_amount = sum(product.price for product in selected_products)
-        if self.wallet.package:
-            commission_percentage = self.wallet.package.profit_percentage
-        else:
-            commission_percentage = 0.5  # Default to 20% if no package is available
-
-        commission = (total_amount * commission_percentage) / 100
+        total_amount, commission = self.get_amount_and_commission(selected_products)
 
         # Create a new game instance
         new_game = Game.objects.create(
@@ -138,40 +263,121 @@ class PlayGameService:
         )
 
         # Associate the selected products with the new game
-        new_game.products.set(selected_products)
-        new_game.save()
+        new_game.products.add(*[product_id for product_id, _ in selected_products])
 
         return new_game, ""
 
+    def pregenerate_daily_games(self, unplayed_games=()):
+        """
+        Create all of the user's remaining games for today in one bulk insert.
+
+        Each game is numbered with the submission slot it fills, skipping the
+        slots already taken by admin-configured special games, so every
+        following submission just advances to the next slot.
+        The games belong to today: those left unplayed are retired by
+        `retire_stale_games` on the first request of the next day.
+        Falls back to `assign_next_game` once the daily quota is used up.
+        Returns a tuple: (game: Game or None, message: str)
+        """
+        played_today = self.games_played_today()
+        special_slots = {game.game_number for game in unplayed_games if game.special_product}
+        slots = [
+            slot for slot in range(played_today + 1, self.total_number_can_play + 1)
+            if slot not in special_slots
+        ]
+        if not slots:
+            return self.assign_next_game()
+
+        available_products = self.get_available_products()
+
+        while True:
+            if not available_products:
+                return None, "No new submission available for you. Check back later"
+
+            # Draw products without repeats across the batch until the pool runs out
+            remaining_products = []
+
+            def draw(count):
+                if len(remaining_products) < count:
+                    remaining_products[:] = random.sample(available_products, len(available_products))
+                return [remaining_products.pop() for _ in range(min(count, len(remaining_products)))]
+
+            selections = [draw(random.choice([1, 2])) for _ in slots]
+
+            # Draw again without the products deleted since the pool was cached
+            missing = find_missing_products(product_id for selected in selections for product_id, _ in selected)
+            if not missing:
+                break
+            available_products = [product for product in available_products if product[0] not in missing]
+
+        rating_nos = generate_unique_rating_nos(len(slots))
+        games, game_products = [], []
+        for slot, rating_no, selected_products in zip(slots, rating_nos, selections):
+            total_amount, commission = self.get_amount_and_commission(selected_products)
+            games.append(Game(
+                user=self.user,
+                played=False,
+                amount=total_amount,
+                commission=commission,
+                is_active=True,
+                game_number=slot,
+                rating_no=rating_no,
+            ))
+            game_products.append([product_id for product_id, _ in selected_products])
+
+        games = Game.objects.bulk_create(games)
+        if games[0].pk is None:
+            # Backends that cannot return ids from a bulk insert
+            ids = dict(Game.objects.filter(user=self.user, rating_no__in=rating_nos).values_list('rating_no', 'id'))
+            for game in games:
+                game.pk = game.id = ids[game.rating_no]
+
+        Game.products.through.objects.bulk_create([
+            Game.products.through(game_id=game.pk, product_id=product_id)
+            for game, product_ids in zip(games, game_products)
+            for product_id in product_ids
+        ])
+
+        return games[0], ""
+
     def play_game(self, rating_score, comment):
         """
         Main method to mark the active game as played and assign the next game.
+
+        The wallet and the user's unplayed games are locked for the whole
+        submission, so concurrent submissions from the same user are serialised.
+        The next game is picked from the same locked rows when one exists.
         Returns a tuple: (game: Game or None, message: str)
         """
-
-        # Retrieve the active game or assign a new one
-        active_game, error = self.get_active_game()
-        if not active_game:
-            return None, error
-        
-        if active_game.pending:
-            # Check if the user is eligible to play
-            can_play, message = self.check_can_user_play_pending_game()
-            if not can_play:
-                return None, message
-        else:
-            # Check if the user is eligible to play
-            can_play, message = self.check_can_user_play()
+        with transaction.atomic():
+            self.lock_wallet()
+            unplayed_games = self.get_unplayed_games(lock=True)
+
+            # Retrieve the active game or assign a new one
+            active_game, error = self.get_active_game(unplayed_games)
+            if not active_game:
+                return None, error
+
+            if active_game.pending:
+                # Check if the user is eligible to play
+                can_play, message = self.check_can_user_play_pending_game()
+            else:
+                # Check if the user is eligible to play
+                can_play, message = self.check_can_user_play()
             if not can_play:
                 return None, message
 
-        # Mark the current active game as played with rating and comment
-        played,error_playing = self.mark_game_as_played(active_game, rating_score, comment)
+            # Mark the current active game as played with rating and comment
+            played, error_playing = self.mark_game_as_played(active_game, rating_score, comment)
 
-        # Assign the next game
-        next_game, error = self.get_active_game()
-        if error:
-            return None, error
+            # Assign the next game
+            if played:
+                unplayed_games = [game for game in unplayed_games if game.pk != active_game.pk]
+            else:
+                unplayed_games = [active_game]
+            next_game, error = self.get_active_game(unplayed_games)
+            if error:
+                return None, error
 
         return next_game, "Submission  successfull!" if played else error_playing
 
@@ -180,23 +386,4 @@ class PlayGameService:
         Main method to mark the active game as played and assign the next game.
         Returns a tuple: (game: Game or None, message: str)
         """
-        # Check if the user is eligible to play
-        can_play, message = self.check_can_user_play_pending_game()
-        if not can_play:
-            return None, message
-
-        # Retrieve the active game or assign a new one
-        active_game, error = self.get_active_game()
-        if error:
-            return None, error
-
-        # Mark the current active game as played with rating and comment
-        played,error_playing = self.mark_game_as_played(active_game, rating_score, comment)
-
-        # Assign the next game
-        next_game, error = self.get_active_game()
-        if error:
-            return None, error
-
-        return next_game, "Submission successfull!" if played else error_playing
-
+        return self.play_game(rating_score, comment)
@@ -0,0 +1,57 @@
+from django.db.models import Count
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.contrib.auth import get_user_model
+from django.dispatch import receiver
+from .models import Product, Game, UserGameStats
+from .product_pool import clear_product_pool
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_product_pool(sender, **kwargs):
+    """
+    Signal to invalidate the candidate-product pool whenever a product changes.
+    """
+    clear_product_pool()
+
+
+@receiver(m2m_changed, sender=Game.products.through)
+def limit_game_products(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal to enforce the maximum number of products per game when products are assigned.
+    """
+    if action != "pre_add" or not pk_set:
+        return
+
+    if reverse:
+        # `instance` is a Product being added to the games in `pk_set`
+        full_games = sender.objects.filter(game_id__in=pk_set).values('game_id').annotate(
+            product_count=Count('id')
+        ).filter(product_count__gte=Game.MAX_PRODUCTS)
+        if full_games.exists():
+            raise ValueError(f"A game cannot have more than {Game.MAX_PRODUCTS} products.")
+        return
+
+    if len(pk_set) > Game.MAX_PRODUCTS or instance.products.count() + len(pk_set) > Game.MAX_PRODUCTS:
+        raise ValueError(f"A game cannot have more than {Game.MAX_PRODUCTS} products.")
+
+
+@receiver(post_save, sender=User)
+def create_user_game_stats(sender, instance, created, **kwargs):
+    """
+    Signal to create the game stats row of every new user.
+    Users registered through `SignupService` get it from the service instead.
+    """
+    if created and not getattr(instance, '_created_by_signup', False):
+        UserGameStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_delete, sender=Game)
+def remove_deleted_game_from_stats(sender, instance, **kwargs):
+    """
+    Signal to keep the user's game stats in step however a game is deleted:
+    through the API, the Django admin, a queryset delete or a cascade.
+    """
+    UserGameStats.record_game_deleted(instance)
@@ -1,3 +1,246 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from shared.helpers import get_day_window
+from shared.testing import CacheResetTestCase, create_admin, create_pack, create_products, create_settings, create_user
+from wallet.models import OnHoldPay, Wallet
+from .models import Game, UserGameStats
+from .product_pool import PRODUCT_POOL_CACHE_KEY, get_product_pool
+from .rating_numbers import (
+    RATING_NO_BLOCK_SIZE, RATING_NO_DIGITS, RATING_NO_DOMAIN, RatingNumberAllocator, permute, unpermute,
+)
+
+# Upper bound on the queries a single play-game submission may issue,
+# including assigning the next game and serializing the response.
+MAX_QUERIES_PER_SUBMISSION = 12
+
+
+class PlayGameTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_settings(minimum_balance_for_submissions=Decimal("0.00"))
+        cls.pack = create_pack()
+        create_products(12)
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("player")
+        Wallet.objects.filter(user=self.user).update(balance=Decimal("500.00"), package=self.pack)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def play(self):
+        return self.client.post("/api/games/play-game/", {"rating_score": 5, "comment": "ok"}, format="json")
+
+    def test_submission_settles_wallet_and_returns_next_game(self):
+        first = self.client.get("/api/games/current-game/").data["data"]
+        response = self.play()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["data"]["id"], first["id"])
+        self.assertEqual(response.data["data"]["current_number_count"], 1)
+
+        wallet = Wallet.objects.get(user=self.user)
+        commission = Decimal(first["commission"])
+        self.assertEqual(wallet.balance, Decimal("500.00") + commission)
+        self.assertEqual(wallet.commission, commission)
+        self.assertTrue(Game.objects.get(pk=first["id"]).played)
+
+        stats = UserGameStats.objects.get(user=self.user)
+        self.assertEqual(stats.games_played, 1)
+        self.assertEqual(stats.total_commission, commission)
+        self.assertIsNotNone(stats.last_played_at)
+
+    def test_submission_pays_the_commission_of_the_current_pack(self):
+        first = self.client.get("/api/games/current-game/").data["data"]
+        gold = create_pack("Gold", Decimal("1000.00"), profit_percentage=Decimal("3.00"))
+        # Upgraded after the day's games were generated at the Basic rate
+        Wallet.objects.filter(user=self.user).update(package=gold)
+
+        self.play()
+
+        commission = (Decimal(first["amount"]) * 3 / 100).quantize(Decimal("0.01"))
+        self.assertEqual(Wallet.objects.get(user=self.user).commission, commission)
+        self.assertEqual(Game.objects.get(pk=first["id"]).commission, commission)
+
+    def test_regular_game_worth_more_than_the_balance_only_adds_the_commission(self):
+        Wallet.objects.filter(user=self.user).update(balance=Decimal("5.00"))
+        first = self.client.get("/api/games/current-game/").data["data"]
+        self.assertGreater(Decimal(first["amount"]), Decimal("5.00"))
+
+        self.assertEqual(self.play().status_code, 200)
+
+        wallet = Wallet.objects.get(user=self.user)
+        self.assertEqual(wallet.balance, Decimal("5.00") + Decimal(first["commission"]))
+        self.assertEqual(wallet.on_hold, 0)
+        self.assertTrue(Game.objects.get(pk=first["id"]).played)
+
+    def test_submission_query_count_is_bounded(self):
+        self.client.get("/api/games/current-game/")
+        for _ in range(3):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.play()
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(queries), MAX_QUERIES_PER_SUBMISSION)
+
+    def test_first_request_pregenerates_the_daily_quota(self):
+        first = self.client.get("/api/games/current-game/").data["data"]
+
+        self.assertEqual(Game.objects.filter(user=self.user).count(), self.pack.daily_missions)
+        self.assertEqual(first["game_number"], 1)
+
+        response = self.play()
+
+        self.assertEqual(response.data["data"]["game_number"], 2)
+        self.assertEqual(Game.objects.filter(user=self.user).count(), self.pack.daily_missions)
+
+    def test_games_pregenerated_on_an_earlier_day_are_replaced(self):
+        self.client.get("/api/games/current-game/")
+        Game.objects.filter(user=self.user).update(created_at=now() - timedelta(days=1))
+
+        first = self.client.get("/api/games/current-game/").data["data"]
+
+        start_of_day, _ = get_day_window()
+        active_games = Game.objects.filter(user=self.user, is_active=True)
+        self.assertEqual(first["game_number"], 1)
+        self.assertEqual(active_games.count(), self.pack.daily_missions)
+        self.assertFalse(active_games.filter(created_at__lt=start_of_day).exists())
+
+    def test_a_special_game_added_after_pregeneration_replaces_the_slot(self):
+        self.client.get("/api/games/current-game/")
+        admin = create_admin()
+        admin_client = APIClient()
+        admin_client.force_authenticate(user=admin)
+        on_hold = OnHoldPay.objects.create(min_amount=Decimal("10.00"), max_amount=Decimal("20.00"))
+        response = admin_client.post("/site_admin/negative-users/", {
+            "user": self.user.pk,
+            "on_hold": on_hold.pk,
+            "number_of_negative_product": 1,
+            "rank_appearance": 2,
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        second = self.play().data["data"]
+        self.assertEqual(second["game_number"], 2)
+        self.assertTrue(second["special_product"])
+        third = self.play().data["data"]
+
+        self.assertEqual(third["game_number"], 3)
+        self.assertFalse(Game.objects.filter(user=self.user, game_number=2, is_active=True, played=False).exists())
+
+    def test_products_deleted_since_the_pool_was_cached_are_not_drawn(self):
+        # A product deleted on another worker, still in this worker's pool
+        cache.set(PRODUCT_POOL_CACHE_KEY, get_product_pool() + [(999999, Decimal("10.00"))])
+
+        response = self.client.get("/api/games/current-game/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Game.objects.filter(user=self.user).count(), self.pack.daily_missions)
+        self.assertFalse(Game.products.through.objects.filter(product_id=999999).exists())
+        self.assertFalse(Game.objects.filter(user=self.user, products__isnull=True).exists())
+
+    def test_special_game_with_insufficient_balance_is_put_on_hold(self):
+        Wallet.objects.filter(user=self.user).update(balance=Decimal("5.00"))
+        special = Game.objects.create(
+            user=self.user,
+            amount=Decimal("50.00"),
+            commission=Decimal("2.50"),
+            special_product=True,
+            game_number=1,
+        )
+
+        response = self.play()
+
+        self.assertEqual(response.data["data"]["id"], special.pk)
+        self.assertTrue(response.data["data"]["pending"])
+        wallet = Wallet.objects.get(user=self.user)
+        self.assertEqual(wallet.balance, Decimal("0.00"))
+        self.assertEqual(wallet.on_hold, Decimal("-45.00"))
+        self.assertEqual(UserGameStats.objects.get(user=self.user).pending_games, 1)
+
+
+class GameProductLimitTestCase(CacheResetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("limit")
+        self.products = create_products(Game.MAX_PRODUCTS + 1, name="Limit product")
+
+    def test_assigning_more_than_the_maximum_products_is_rejected(self):
+        game = Game.objects.create(user=self.user, amount=Decimal("10.00"), commission=Decimal("1.00"))
+        game.products.set(self.products[:Game.MAX_PRODUCTS])
+
+        with self.assertRaises(ValueError), transaction.atomic():
+            game.products.add(self.products[-1])
+        self.assertEqual(game.products.count(), Game.MAX_PRODUCTS)
+
+
+class GameDeletionStatsTestCase(CacheResetTestCase):
+
+    def test_deleting_games_any_way_updates_the_stats(self):
+        user = create_user("deleted")
+        games = [
+            Game.objects.create(user=user, amount=Decimal("10.00"), commission=Decimal("0.10"), played=True)
+            for _ in range(3)
+        ]
+        pending = Game.objects.create(
+            user=user, amount=Decimal("50.00"), commission=Decimal("2.50"), special_product=True, pending=True
+        )
+        UserGameStats.rebuild([user.pk])
+
+        games[0].delete()
+        Game.objects.filter(pk__in=[games[1].pk, pending.pk]).delete()
+
+        stats = UserGameStats.objects.get(user=user)
+        self.assertEqual(stats.games_played, 1)
+        self.assertEqual(stats.total_commission, Decimal("0.10"))
+        self.assertEqual(stats.pending_games, 0)
+
+        user.delete()
+        self.assertFalse(UserGameStats.objects.exists())
+
+
+class DailyGameStatsBackfillTestCase(CacheResetTestCase):
+
+    def test_todays_counts_are_seeded_from_the_games_played_today(self):
+        backfill_today = import_module("game.migrations.0012_dailygamestats").backfill_today
+        user = create_user("early")
+        for played in (True, True, False):
+            Game.objects.create(user=user, amount=Decimal("10.00"), commission=Decimal("0.10"), played=played)
+        yesterday = Game.objects.create(user=user, amount=Decimal("10.00"), commission=Decimal("0.10"), played=True)
+        Game.objects.filter(pk=yesterday.pk).update(created_at=now() - timedelta(days=1))
+
+        backfill_today(apps, None)
+
+        self.assertEqual(Game.count_games_played_today(user), 2)
+
+
+class RatingNumberTestCase(CacheResetTestCase):
+    key = b"test-key"
+
+    def test_permutation_is_a_bijection_over_a_sample(self):
+        sample = list(range(5000)) + list(range(RATING_NO_DOMAIN - 5000, RATING_NO_DOMAIN))
+
+        permuted = [permute(value, self.key) for value in sample]
+
+        self.assertEqual(len(set(permuted)), len(sample))
+        self.assertTrue(all(0 <= value < RATING_NO_DOMAIN for value in permuted))
+        self.assertEqual([unpermute(value, self.key) for value in permuted], sample)
+
+    def test_allocate_returns_distinct_padded_numbers_across_a_block_boundary(self):
+        allocator = RatingNumberAllocator()
+
+        numbers = allocator.allocate(RATING_NO_BLOCK_SIZE - 5) + allocator.allocate(10)
+
+        self.assertEqual(len(numbers), RATING_NO_BLOCK_SIZE + 5)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertTrue(all(len(number) == RATING_NO_DIGITS and number.isdigit() for number in numbers))
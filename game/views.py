@@ -8,6 +8,7 @@ from rest_framework import status
 from .models import Game
 from .serializers import ProductSerializer,GameSerializer
 from shared.mixins import StandardResponseMixin
+from shared.pagination import KeysetPagination
 from core.permissions import IsAdminOrReadOnly
 from .services import PlayGameService
 from wallet.models import Wallet
@@ -25,6 +26,8 @@ class ProductViewSet(StandardResponseMixin, ModelViewSet):
     queryset = Product.objects.all().order_by('-date_created')
     serializer_class = ProductSerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = KeysetPagination
+    pagination_ordering = '-date_created'
     parser_classes = [MultiPartParser, FormParser]
 
 
@@ -39,12 +42,14 @@ class GameViewSet(StandardResponseMixin, ViewSet):
     def get_service(self, user):
         """
         Helper method to initialize the PlayGameService.
+        The wallet usually comes with the authenticated user from the cache.
         """
-        wallet = getattr(user, 'wallet', None)
-        if not wallet:
+        try:
+            wallet = user.wallet
+        except Wallet.DoesNotExist:
             wallet = Wallet.objects.create(user=user)
 
-        total_number_can_play = wallet.package.daily_missions  # Example: Maximum number of games per day
+        total_number_can_play = wallet.cached_package.daily_missions  # Example: Maximum number of games per day
         return PlayGameService(user, total_number_can_play, wallet), ""
 
     @action(detail=False, methods=['get'], url_path='current-game')
@@ -67,7 +72,7 @@ class GameViewSet(StandardResponseMixin, ViewSet):
         game, error = service.get_active_game()
         error_payload = {
             "total_number_can_play": service.total_number_can_play,
-            "current_number_count": Game.count_games_played_today(user)
+            "current_number_count": service.games_played_today()
         }
         if error:
             return self.standard_response(
@@ -82,7 +87,7 @@ class GameViewSet(StandardResponseMixin, ViewSet):
             game,
             context={
                 "total_number_can_play": service.total_number_can_play,
-                "current_number_count": Game.count_games_played_today(user),
+                "current_number_count": service.games_played_today(),
             }
         )
         return self.standard_response(
@@ -154,7 +159,7 @@ class GameViewSet(StandardResponseMixin, ViewSet):
             game,
             context={
                 "total_number_can_play": service.total_number_can_play,
-                "current_number_count": Game.count_games_played_today(user),
+                "current_number_count": service.games_played_today(),
             }
         )
         return self.standard_response(
@@ -173,19 +178,11 @@ class GameViewSet(StandardResponseMixin, ViewSet):
             user=user,is_active=True
         ).filter(
             Q(played=True) | Q(pending=True)
-        ).order_by('-updated_at', '-created_at')
-
-        # Serialize the data
-        serializer = GameSerializer.List(games, many=True)
-
-        # Use the preferred response format
-        return self.standard_response(
-            success=True,
-            message="Game record",
-            data=serializer.data,
-            status_code=status.HTTP_200_OK
         )
 
+        # Serialize one page of the records, most recently updated first
+        return self.keyset_paginated_response(games, GameSerializer.List, ('-updated_at', '-created_at'))
+
 
 class UserEventViewSet(StandardResponseMixin,ModelViewSet):
     """
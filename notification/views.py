@@ -20,14 +20,8 @@ class UserNotificationViewSet(StandardResponseMixin, ViewSet):
         """
         List all notifications for the authenticated user.
         """
-        notifications = request.user.notifications.filter(type=Notification.USER).order_by('is_read', '-created_at')
-        serializer = UserNotification.NotificationSerializer(notifications, many=True)
-        return self.standard_response(
-            success=True,
-            message="All notifications have been fetched.",
-            data=serializer.data,
-            status_code=status.HTTP_200_OK
-        )
+        notifications = request.user.notifications.filter(type=Notification.USER)
+        return self.keyset_paginated_response(notifications, UserNotification.NotificationSerializer, '-created_at')
 
     @action(detail=False, methods=["post"], url_path="mark-all-read")
     def mark_all_as_read(self, request):
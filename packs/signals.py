@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Pack
+from .tiers import clear_pack_tiers
+
+
+@receiver(post_save, sender=Pack)
+@receiver(post_delete, sender=Pack)
+def refresh_pack_tiers(sender, **kwargs):
+    """
+    Signal to invalidate the cached pack tier table whenever a pack changes.
+    Cleared again on commit so no worker keeps a table read before the change was committed.
+    """
+    clear_pack_tiers()
+    transaction.on_commit(clear_pack_tiers)
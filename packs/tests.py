@@ -1,3 +1,44 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import override_settings
+
+from shared.testing import CacheResetTestCase, create_admin, create_pack
+from .models import Pack
+from .serializers import PackSerializer
+from .tiers import PACK_TIERS_VERSION_KEY, get_pack
+
+
+class PackTiersTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pack = create_pack(created_by=create_admin())
+
+    def edit_elsewhere(self, **fields):
+        # Like a change made by another worker, which only reaches this one through the cache
+        Pack.objects.filter(pk=self.pack.pk).update(**fields)
+
+    @override_settings(LOCAL_CACHE_CHECK_SECONDS=0)
+    def test_a_version_bump_in_the_shared_cache_reloads_the_tiers(self):
+        get_pack(self.pack.pk)
+        self.edit_elsewhere(daily_missions=60)
+        self.assertEqual(get_pack(self.pack.pk).daily_missions, 40)
+
+        cache.set(PACK_TIERS_VERSION_KEY, "bumped elsewhere", None)
+
+        self.assertEqual(get_pack(self.pack.pk).daily_missions, 60)
+
+    @override_settings(LOCAL_CACHE_CHECK_SECONDS=0, LOCAL_CACHE_TIMEOUT_SECONDS=0)
+    def test_tiers_are_reloaded_after_the_timeout_without_an_invalidation(self):
+        get_pack(self.pack.pk)
+        self.edit_elsewhere(profit_percentage=Decimal("2.00"))
+
+        self.assertEqual(get_pack(self.pack.pk).profit_percentage, Decimal("2.00"))
+
+    def test_the_tier_table_keeps_only_the_creator_fields_it_shows(self):
+        pack = get_pack(self.pack.pk)
+
+        self.assertIn("password", pack.created_by.get_deferred_fields())
+        with self.assertNumQueries(0):
+            self.assertEqual(PackSerializer(pack).data["created_by"]["username"], "admin")
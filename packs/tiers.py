@@ -0,0 +1,89 @@
+from bisect import bisect_right
+
+from django.db.models import Case, IntegerField, Value, When
+
+from shared.caching import LocalCopy
+from .models import Pack
+
+PACK_TIERS_VERSION_KEY = "packs:tiers:version"
+
+# The creator fields PackSerializer shows with each pack. Only these are kept in
+# the long-lived tier table, so it never holds password hashes or other user data.
+PACK_CREATOR_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'is_active')
+
+
+def _load_pack_tiers(version):
+    """
+    Build the tier table from the database, with one query.
+    """
+    packs = list(
+        Pack.objects.select_related('created_by')
+        .only(
+            *[field.name for field in Pack._meta.concrete_fields],
+            *[f'created_by__{field}' for field in PACK_CREATOR_FIELDS],
+        )
+        .order_by('usd_value')
+    )
+    active_packs = [pack for pack in packs if pack.is_active]
+    return {
+        "values": [pack.usd_value for pack in active_packs],
+        "packs": active_packs,
+        "by_id": {pack.pk: pack for pack in packs},
+    }
+
+
+# Per-worker copy of the tier table.
+# The Pack instances are shared between requests and must be treated as read-only.
+_pack_tiers = LocalCopy(PACK_TIERS_VERSION_KEY, _load_pack_tiers)
+
+
+def get_pack_tiers():
+    """
+    Return the active packs sorted by `usd_value`, with the matching list of values.
+    """
+    tiers = _pack_tiers.get()
+    return tiers["values"], tiers["packs"]
+
+
+def get_pack(pack_id):
+    """
+    Return the Pack with the given id, active or not, from the tier table.
+    """
+    if pack_id is None:
+        return None
+    return _pack_tiers.get()["by_id"].get(pack_id)
+
+
+def clear_pack_tiers():
+    """
+    Invalidate the tier table. This worker rebuilds it on the next call and
+    the others within `LOCAL_CACHE_CHECK_SECONDS`, through the shared cache.
+    """
+    _pack_tiers.clear()
+
+
+def get_pack_for_balance(balance):
+    """
+    Return the highest active Pack the balance qualifies for,
+    falling back to the lowest active Pack.
+    """
+    values, packs = get_pack_tiers()
+    if not packs:
+        return None
+    index = bisect_right(values, balance) - 1
+    return packs[max(index, 0)]
+
+
+def get_pack_for_balance_expression(field='balance'):
+    """
+    Return a Case expression computing `get_pack_for_balance` in SQL from `field`,
+    to re-tier many wallets in one UPDATE. Returns None when there are no active packs.
+    """
+    values, packs = get_pack_tiers()
+    if not packs:
+        return None
+    return Case(
+        *[When(**{f'{field}__gte': pack.usd_value}, then=Value(pack.pk)) for pack in reversed(packs)],
+        default=Value(packs[0].pk),
+        output_field=IntegerField(),
+    )
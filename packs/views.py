@@ -5,6 +5,7 @@ from core.permissions import IsSiteAdmin
 from rest_framework.decorators import action
 from rest_framework import status
 from .models import Pack
+from .tiers import get_pack_tiers
 from .serializers import PackSerializer
 from shared.mixins import StandardResponseMixin
 from rest_framework.response import Response
@@ -39,7 +40,7 @@ class PackViewSet(StandardResponseMixin, ModelViewSet):
         """
         Endpoint to get all active packs.
         """
-        active_packs = self.queryset.filter(is_active=True).order_by('usd_value')
+        _, active_packs = get_pack_tiers()
         serializer = self.get_serializer(active_packs, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -0,0 +1,93 @@
+import time as clock
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+__all__ = [
+    "register_local_cache",
+    "clear_caches",
+    "LocalCopy",
+]
+
+# Functions that drop a module's per-worker copy of data kept in the shared cache
+_local_resets = []
+
+
+def register_local_cache(reset):
+    """
+    Register a function that drops a module's per-worker copy, so `clear_caches` resets it too.
+    Can be used as a decorator.
+    """
+    _local_resets.append(reset)
+    return reset
+
+
+def clear_caches():
+    """
+    Clear the shared cache along with every registered per-worker copy.
+    """
+    cache.clear()
+    for reset in _local_resets:
+        reset()
+
+
+def _get_check_interval():
+    return getattr(settings, "LOCAL_CACHE_CHECK_SECONDS", 5)
+
+
+def _get_timeout():
+    return getattr(settings, "LOCAL_CACHE_TIMEOUT_SECONDS", 60)
+
+
+class LocalCopy:
+    """
+    Per-worker copy of data loaded from the database, shared between requests.
+
+    Workers stay in step through a version stamp in the shared cache: `clear` bumps it,
+    and every worker reloads once it reads the new stamp. The stamp is read at most every
+    `LOCAL_CACHE_CHECK_SECONDS`, and the copy is reloaded after `LOCAL_CACHE_TIMEOUT_SECONDS`
+    whatever the stamp says, so a lost invalidation can't keep it stale.
+    """
+
+    def __init__(self, version_key, load):
+        """
+        `load` is called with the current version stamp and returns the data to keep.
+        """
+        self.version_key = version_key
+        self.load = load
+        self.reset()
+        register_local_cache(self.reset)
+
+    def _get_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def get(self):
+        # The state is replaced as a whole, so concurrent requests never see half of it
+        value, version, loaded_at, checked_at = self._state
+        current = clock.monotonic()
+        if loaded_at is not None and current - checked_at < _get_check_interval():
+            return value
+
+        latest = self._get_version()
+        if loaded_at is None or latest != version or current - loaded_at >= _get_timeout():
+            value, loaded_at = self.load(latest), current
+        self._state = (value, latest, loaded_at, current)
+        return value
+
+    def reset(self):
+        """
+        Drop this worker's copy, so the next `get` loads it again.
+        """
+        self._state = (None, None, None, None)
+
+    def clear(self):
+        """
+        Invalidate the copy in every worker by bumping the shared version.
+        """
+        cache.set(self.version_key, uuid4().hex, None)
+        self.reset()
@@ -0,0 +1,17 @@
+from rest_framework.filters import OrderingFilter
+
+
+class AliasOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that also accepts the names in the view's `ordering_aliases`,
+    a dict mapping a name clients may send to the field actually sorted on.
+    Lets a view sort on an annotation while keeping the public parameter name.
+    """
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        aliases = getattr(view, 'ordering_aliases', {})
+        fields = [
+            ('-' if term.startswith('-') else '') + aliases.get(term.lstrip('-'), term.lstrip('-'))
+            for term in fields
+        ]
+        return super().remove_invalid_fields(queryset, fields, view, request)
@@ -1,3 +1,4 @@
-from .invitation import *
 from .settings import *
-from .notification import *
\ No newline at end of file
+from .notification import *
+from .day_window import *
+from .streaming import *
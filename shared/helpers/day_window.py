@@ -0,0 +1,66 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import pytz
+from django.conf import settings as django_settings
+from django.utils.timezone import localdate
+
+from .settings import get_settings
+
+__all__ = [
+    "get_operator_timezone",
+    "get_today",
+    "get_day_window",
+    "get_year_window",
+]
+
+@lru_cache(maxsize=8)
+def _resolve_timezone(name: Optional[str]):
+    try:
+        return pytz.timezone(name or django_settings.TIME_ZONE)
+    except pytz.UnknownTimeZoneError:
+        return pytz.timezone(django_settings.TIME_ZONE)
+
+
+def get_operator_timezone():
+    """
+    Return the timezone configured in the admin Settings (`Settings.timezone`).
+    Falls back to the project TIME_ZONE when no settings exist or the name is invalid.
+    """
+    return _resolve_timezone(getattr(get_settings(), "timezone", None))
+
+
+def get_today() -> date:
+    """
+    Return today's date in the operator's timezone.
+    """
+    return localdate(timezone=get_operator_timezone())
+
+
+@lru_cache(maxsize=32)
+def _day_window(timezone_name: str, day: date) -> Tuple[datetime, datetime]:
+    tz = pytz.timezone(timezone_name)
+    start = tz.localize(datetime.combine(day, time.min))
+    end = tz.localize(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def get_day_window(day: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """
+    Return the aware [start, end) datetimes of a day in the operator's timezone.
+    Defaults to today. Use with `__gte=start, __lt=end` range filters.
+    """
+    tz = get_operator_timezone()
+    return _day_window(tz.zone, day or localdate(timezone=tz))
+
+
+def get_year_window(year: Optional[int] = None) -> Tuple[datetime, datetime]:
+    """
+    Return the aware [start, end) datetimes of a year in the operator's timezone.
+    Defaults to the current year.
+    """
+    year = year or get_today().year
+    start, _ = get_day_window(date(year, 1, 1))
+    end, _ = get_day_window(date(year + 1, 1, 1))
+    return start, end
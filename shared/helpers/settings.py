@@ -1,7 +1,52 @@
 from administration.models import Settings
+from shared.caching import LocalCopy
+
+__all__ = [
+    "get_settings",
+    "get_settings_data",
+    "clear_settings",
+]
+
+SETTINGS_VERSION_KEY = "settings:version"
+
+
+def _load_settings(version):
+    from administration.serializers import SettingsSerializer
+
+    instance = Settings.objects.first()
+    return {
+        "instance": instance,
+        "data": SettingsSerializer(instance=instance).data if instance else None,
+    }
+
+
+# Per-worker copy of the Settings row and its serialized payload.
+# The instance is shared between requests and must be treated as read-only.
+_settings = LocalCopy(SETTINGS_VERSION_KEY, _load_settings)
+
 
 def get_settings():
+    """
+    Return the global Settings instance, or None when it hasn't been created.
+    The instance is cached per worker, so load it from the database to update it.
+    """
     try:
-        return Settings.objects.first()
+        return _settings.get()["instance"]
     except Settings.DoesNotExist:
-        raise ValueError("Admin Settings isnt available")
\ No newline at end of file
+        raise ValueError("Admin Settings isnt available")
+
+
+def get_settings_data():
+    """
+    Return the pre-rendered `SettingsSerializer` payload, or None when no Settings exist.
+    """
+    data = _settings.get()["data"]
+    return dict(data) if data is not None else None
+
+
+def clear_settings():
+    """
+    Invalidate the cached Settings. This worker reloads them on the next call and
+    the others within `LOCAL_CACHE_CHECK_SECONDS`, through the shared cache.
+    """
+    _settings.clear()
@@ -0,0 +1,55 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+__all__ = [
+    "STREAM_FORMATS",
+    "iter_lines",
+    "stream_rows",
+]
+
+STREAM_FORMATS = ("csv", "ndjson")
+
+
+class _Echo:
+    """
+    File-like object that hands each written line back to the csv writer's caller.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row.get(field) for field in fields])
+
+
+def _ndjson_lines(rows, fields):
+    for row in rows:
+        yield json.dumps({field: row.get(field) for field in fields}, cls=DjangoJSONEncoder) + "\n"
+
+
+def iter_lines(rows, fields, format="csv"):
+    """
+    Yield an iterable of dicts as CSV or NDJSON lines, one row at a time.
+    Only the given fields are written, in that order.
+    """
+    if format not in STREAM_FORMATS:
+        raise ValueError(f"Invalid format. Allowed formats: {', '.join(STREAM_FORMATS)}")
+    return _csv_lines(rows, fields) if format == "csv" else _ndjson_lines(rows, fields)
+
+
+def stream_rows(rows, fields, format="csv", filename="export"):
+    """
+    Stream an iterable of dicts as a CSV or NDJSON download without building it in memory.
+    Only the given fields are written, in that order.
+    """
+    content_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(iter_lines(rows, fields, format), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{format}"'
+    return response
@@ -1,5 +1,6 @@
 from rest_framework.response import Response
 from shared.utils import standard_response
+from shared.pagination import KeysetPagination
 
 from rest_framework import serializers
 from django.contrib.auth import authenticate,get_user_model
@@ -70,6 +71,17 @@ class StandardResponseMixin:
         """
         return standard_response(**kwargs)
 
+    def keyset_paginated_response(self, queryset, serializer_class, ordering, **serializer_kwargs):
+        """
+        Serialize one keyset page of the queryset, sorted by `ordering`, in the standard format.
+        For views that build their list responses by hand.
+        """
+        paginator = KeysetPagination()
+        paginator.ordering = ordering
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        serializer = serializer_class(page, many=True, **serializer_kwargs)
+        return paginator.get_paginated_response(serializer.data)
+
 
 
 class AdminPasswordMixin(serializers.Serializer):
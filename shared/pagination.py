@@ -1,4 +1,8 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination, _reverse_ordering
 from shared.utils import standard_response
 
 
@@ -25,3 +29,145 @@ class CustomPagination(PageNumberPagination):
             errors=None,
             status_code=200  # HTTP 200 OK
         )
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination in the standard response format.
+
+    Responses put the page under `data` as `{"items": [...], "pagination": {...}}`,
+    where `pagination` holds the `next` and `previous` page links, the `page_size`
+    and, when the client asks for it with `?count=true`, the total `count`.
+    Endpoints that switch to this paginator change shape from a bare list in `data`,
+    so clients have to read `data.items` and follow `data.pagination.next`.
+
+    Pages are fetched with a keyset condition on every field of the view's ordering,
+    which always ends on the primary key, instead of an OFFSET. Rows that share a sort
+    value are told apart by the following fields, so any leading field can be used.
+    Views set the ordering with `pagination_ordering`, or through an OrderingFilter.
+    Sort fields must never be NULL, since a page can't resume after a NULL:
+    annotate nullable fields with Coalesce and sort on the annotation.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, current_position = (self.cursor.reverse, self.cursor.position) if self.cursor else (False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self._get_keyset_condition(current_position, reverse))
+
+        # Fetch one extra row to tell whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > len(self.page) else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = current_position is not None, current_position
+            self.has_previous, self.previous_position = following_position is not None, following_position
+        else:
+            self.has_next, self.next_position = following_position is not None, following_position
+            self.has_previous, self.previous_position = current_position is not None, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Use the view's `pagination_ordering` when it sets one, and end on the primary key
+        so every row has a distinct position.
+        """
+        ordering = getattr(view, 'pagination_ordering', None)
+        if ordering is None:
+            ordering = super().get_ordering(request, queryset, view)
+        elif isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering += ('-pk' if ordering[0].startswith('-') else 'pk',)
+        return ordering
+
+    def _get_keyset_condition(self, position, reverse):
+        """
+        Match the rows after `position` in the ordering, comparing the sort fields in turn:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition, equal = Q(), {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        # Every sort field, following related lookups such as "wallet__commission"
+        position = []
+        for field in ordering:
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                value = value[attr] if isinstance(value, dict) else getattr(value, attr, None)
+            position.append(None if value is None else str(value))
+        return position
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        if cursor.position is not None:
+            cursor = Cursor(offset=0, reverse=cursor.reverse, position=json.dumps(cursor.position))
+        return super().encode_cursor(cursor)
+
+    def get_paginated_response(self, data):
+        """
+        Return the page in the standard format, with links to the neighbouring pages.
+        """
+        pagination = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "page_size": self.page_size,
+        }
+        if self.count is not None:
+            pagination["count"] = self.count
+        return standard_response(
+            success=True,
+            message="Data fetched successfully.",
+            data={
+                "items": data,
+                "pagination": pagination,
+            },
+            errors=None,
+            status_code=200
+        )
@@ -0,0 +1,91 @@
+from decimal import Decimal
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .caching import clear_caches
+
+# Phone numbers handed to test users, unique within the test run
+_phone_numbers = count(1)
+
+
+def create_settings(**fields):
+    """
+    Create the admin Settings with the service open all day.
+    """
+    from administration.models import Settings
+
+    fields.setdefault('service_availability_start_time', "00:00:00")
+    fields.setdefault('service_availability_end_time', "23:59:59")
+    return Settings.objects.create(**fields)
+
+
+def create_pack(name="Basic", usd_value=Decimal("0.00"), **fields):
+    """
+    Create an active Pack. Only the name and value need to differ between packs.
+    """
+    from packs.models import Pack
+
+    fields.setdefault('daily_missions', 40)
+    fields.setdefault('daily_withdrawals', 1)
+    fields.setdefault('profit_percentage', Decimal("1.00"))
+    return Pack.objects.create(
+        name=name,
+        usd_value=usd_value,
+        icon=f"pack_icons/{name.lower()}.png",
+        short_description=name,
+        description=f"{name} pack",
+        **fields,
+    )
+
+
+def create_products(count, name="Product", price=Decimal("10.00")):
+    """
+    Create `count` products of the same price, named "<name> <n>".
+    """
+    from game.models import Product
+
+    return [
+        Product.objects.create(
+            name=f"{name} {index}",
+            price=price,
+            description=name,
+            image="product_images/product.png",
+        )
+        for index in range(count)
+    ]
+
+
+def create_user(username, **fields):
+    """
+    Create a user, with their wallet, whose password is "password" and transactional password "1234".
+    """
+    fields.setdefault('email', f"{username}@example.com")
+    fields.setdefault('phone_number', f"9{next(_phone_numbers):09d}")
+    fields.setdefault('transactional_password', "1234")
+    return get_user_model().objects.create_user(username=username, password="password", **fields)
+
+
+def create_admin(username="admin", **fields):
+    """
+    Create a superuser, like `create_user`.
+    """
+    return create_user(username, is_staff=True, is_superuser=True, **fields)
+
+
+class CacheResetTestCase(TestCase):
+    """
+    TestCase that clears every cache before its class data is created and before each test,
+    so nothing cached from a rolled-back test case is read.
+    Tests run against the configured cache, so query counts include any cache round trips.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        clear_caches()
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        clear_caches()
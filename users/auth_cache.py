@@ -0,0 +1,71 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from packs.tiers import get_pack
+
+AUTH_USER_CACHE_KEY = "users:auth:{}"
+AUTH_USER_VERSION_KEY = "users:auth:version:{}"
+
+
+def _get_timeout():
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT_SECONDS", 300)
+
+
+def _attach_pack(user):
+    # The pack comes from the tier table, which has its own invalidation
+    wallet = user._state.fields_cache.get('wallet')
+    if wallet is not None:
+        type(wallet).package.field.set_cached_value(wallet, get_pack(wallet.package_id))
+    return user
+
+
+def get_cached_user(user_id):
+    """
+    Return the user with their wallet and pack, loading them from the database only
+    when the cached entry is missing or older than the user's current version.
+    Raises `User.DoesNotExist` when there is no such user.
+    """
+    User = get_user_model()
+    entry_key = AUTH_USER_CACHE_KEY.format(user_id)
+    version_key = AUTH_USER_VERSION_KEY.format(user_id)
+
+    cached = cache.get_many([entry_key, version_key])
+    version = cached.get(version_key)
+    entry = cached.get(entry_key)
+    if version is not None and entry is not None and entry[0] == version:
+        return _attach_pack(entry[1])
+
+    if version is None:
+        cache.add(version_key, uuid4().hex, None)
+        version = cache.get(version_key)
+
+    # The version is read before the row, so a change committed in between
+    # leaves this entry behind the new version and it is never served
+    user = User.objects.select_related('wallet').get(pk=user_id)
+    cache.set(entry_key, (version, user), _get_timeout())
+    return _attach_pack(user)
+
+
+def clear_cached_user(user_id):
+    """
+    Invalidate the user's cached entry, now and again once the current transaction commits.
+    """
+    clear_cached_users([user_id])
+
+
+def clear_cached_users(user_ids):
+    """
+    Invalidate the cached entries of many users with one cache round trip,
+    now and again once the current transaction commits.
+    """
+    version_keys = [AUTH_USER_VERSION_KEY.format(user_id) for user_id in user_ids]
+
+    def bump():
+        cache.set_many({version_key: uuid4().hex for version_key in version_keys}, None)
+
+    bump()
+    transaction.on_commit(bump)
@@ -0,0 +1,141 @@
+import hashlib
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+# Codes are 6 characters: a digit followed by five characters of a 32-symbol
+# alphabet without look-alikes (I, O, 0, 1). That gives exactly 2**28 codes,
+# and codes issued before the allocator (six letters) can never collide with them.
+CODE_LEAD = "23456789"
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 6
+CODE_BITS = 28
+
+# The lowest bit of the counter says which table the code belongs to,
+# so redemption only has to look in one place.
+REFERRAL_CODE = 0
+INVITATION_CODE = 1
+
+HALF_BITS = CODE_BITS // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+
+CODE_SEQUENCE = "users_code_seq"
+
+
+def _round(value, round_index, key):
+    digest = hashlib.blake2b(
+        value.to_bytes(2, "big"),
+        digest_size=4,
+        key=key,
+        person=round_index.to_bytes(1, "big") * 16,
+    ).digest()
+    return int.from_bytes(digest, "big") & HALF_MASK
+
+
+def _get_key():
+    return settings.CODE_PERMUTATION_KEY.encode()[:64]
+
+
+def permute(value, key):
+    """
+    Map a counter value in [0, 2**28) to a unique, random-looking value in the same range.
+    """
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for round_index in range(ROUNDS):
+        left, right = right, left ^ _round(right, round_index, key)
+    return (left << HALF_BITS) | right
+
+
+def unpermute(value, key):
+    """
+    Inverse of `permute`.
+    """
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for round_index in reversed(range(ROUNDS)):
+        left, right = right ^ _round(left, round_index, key), left
+    return (left << HALF_BITS) | right
+
+
+def encode(counter):
+    """
+    Turn a counter value into its 6-character code.
+    """
+    if not 0 <= counter < 1 << CODE_BITS:
+        raise ValueError("Code counter is out of range.")
+    value = permute(counter, _get_key())
+    chars = []
+    for _ in range(CODE_LENGTH - 1):
+        chars.append(CODE_ALPHABET[value & 31])
+        value >>= 5
+    return CODE_LEAD[value] + "".join(reversed(chars))
+
+
+def decode(code):
+    """
+    Return the counter value behind a code, or None when it isn't an allocated-format code.
+    """
+    if len(code) != CODE_LENGTH or code[0] not in CODE_LEAD:
+        return None
+    value = CODE_LEAD.index(code[0])
+    for char in code[1:]:
+        index = CODE_ALPHABET.find(char)
+        if index < 0:
+            return None
+        value = (value << 5) | index
+    return unpermute(value, _get_key())
+
+
+def get_code_kind(code):
+    """
+    Return REFERRAL_CODE or INVITATION_CODE for an allocated code, None for older codes.
+    """
+    counter = decode(code) if code else None
+    return None if counter is None else counter & 1
+
+
+def reserve_counters(count):
+    """
+    Reserve `count` values of the code sequence in one statement.
+    PostgreSQL uses a sequence; other backends fall back to the CodeSequence row.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [CODE_SEQUENCE, count])
+            return [row[0] - 1 for row in cursor.fetchall()]
+
+    CodeSequence = apps.get_model("users", "CodeSequence")
+    with transaction.atomic():
+        sequence, _ = CodeSequence.objects.select_for_update().get_or_create(pk=1)
+        start = sequence.next_value
+        CodeSequence.objects.filter(pk=1).update(next_value=F("next_value") + count)
+    return list(range(start, start + count))
+
+
+def allocate_codes(kind, count=1):
+    """
+    Return `count` new, unique codes of the given kind (REFERRAL_CODE or INVITATION_CODE).
+    """
+    return [encode(counter * 2 + kind) for counter in reserve_counters(count)]
+
+
+def allocate_code(kind):
+    return allocate_codes(kind)[0]
+
+
+def find_code_owner(code):
+    """
+    Return the User whose referral code this is, or the InvitationCode with this code,
+    or None. Allocated codes are resolved with one indexed lookup in the right table.
+    """
+    User = apps.get_model("users", "User")
+    InvitationCode = apps.get_model("users", "InvitationCode")
+
+    kind = get_code_kind(code)
+    if kind != INVITATION_CODE:
+        user = User.objects.filter(referral_code=code).first()
+        if user is not None or kind == REFERRAL_CODE:
+            return user
+    return InvitationCode.objects.filter(invitation_code=code).first()
@@ -0,0 +1,158 @@
+import atexit
+import logging
+import os
+import threading
+import time as clock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils.timezone import now
+
+from administration.models import DashboardRollup
+from shared.helpers import get_day_window
+
+logger = logging.getLogger(__name__)
+
+LAST_CONNECTION_CACHE_KEY = "users:last_connection:{}"
+
+# Buffered timestamps of this worker, waiting to be written by the next flush
+_pending = {}
+_pending_lock = threading.Lock()
+_last_flush = {"at": clock.monotonic()}
+# Process that started the background flusher
+_flusher = {"pid": None}
+
+
+def _get_resolution():
+    return getattr(settings, "LAST_CONNECTION_RESOLUTION_SECONDS", 60)
+
+
+def _get_flush_interval():
+    return getattr(settings, "LAST_CONNECTION_FLUSH_INTERVAL_SECONDS", 60)
+
+
+def get_last_connection(user):
+    """
+    Return the user's most recent connection, including a buffered one not yet written.
+    """
+    buffered = cache.get(LAST_CONNECTION_CACHE_KEY.format(user.pk))
+    if buffered and (user.last_connection is None or buffered > user.last_connection):
+        return buffered
+    return user.last_connection
+
+
+def apply_pending_connections(users):
+    """
+    Set `last_connection` on each user to the buffered value when it is more recent.
+    Uses a single cache round trip for the whole list.
+    """
+    users = list(users)
+    keys = {LAST_CONNECTION_CACHE_KEY.format(user.pk): user for user in users}
+    for key, buffered in cache.get_many(list(keys)).items():
+        user = keys[key]
+        if user.last_connection is None or buffered > user.last_connection:
+            user.last_connection = buffered
+    return users
+
+
+def record_connection(user):
+    """
+    Record that the user made a request.
+
+    At most one timestamp is kept per user per `LAST_CONNECTION_RESOLUTION_SECONDS`.
+    It is buffered and written by a later flush, except for the first connection
+    of the day, which is written straight away so daily login counts stay exact.
+    """
+    current = now()
+    key = LAST_CONNECTION_CACHE_KEY.format(user.pk)
+    last_seen = get_last_connection(user)
+    if last_seen and (current - last_seen).total_seconds() < _get_resolution():
+        return
+
+    cache.set(key, current, 60 * 60 * 24)
+    user.last_connection = current
+
+    start_of_today, _ = get_day_window()
+    if last_seen is None or last_seen < start_of_today:
+        # Only the request whose UPDATE moves the connection into today counts the login,
+        # even when several workers see the user's first request of the day at once
+        first_today = type(user).objects.filter(pk=user.pk).filter(
+            Q(last_connection__isnull=True) | Q(last_connection__lt=start_of_today)
+        ).update(last_connection=current)
+        if first_today:
+            if not user.is_staff:
+                DashboardRollup.record(logins=1)
+            return
+
+    _start_flusher()
+    with _pending_lock:
+        _pending[user.pk] = current
+    if clock.monotonic() - _last_flush["at"] >= _get_flush_interval():
+        flush_connections()
+
+
+def _start_flusher():
+    """
+    Start the thread that flushes this worker's buffer every interval, once per process,
+    so timestamps are written even when the worker stops receiving requests.
+    """
+    pid = os.getpid()
+    if _flusher["pid"] == pid:
+        return
+    with _pending_lock:
+        # Checked by process id, as a forked worker doesn't inherit the thread
+        if _flusher["pid"] == pid:
+            return
+        _flusher["pid"] = pid
+    threading.Thread(target=_flush_periodically, name="last-connection-flusher", daemon=True).start()
+
+
+def _flush_periodically():
+    while True:
+        clock.sleep(_get_flush_interval())
+        flush_connections()
+        # Requests close their own connections, but nothing closes this thread's
+        connections.close_all()
+
+
+def flush_connections():
+    """
+    Write every buffered timestamp of this worker in one bulk UPDATE,
+    never moving a user's last connection back.
+    Returns the number of users updated.
+    """
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush["at"] = clock.monotonic()
+    if not pending:
+        return 0
+
+    User = get_user_model()
+    try:
+        return User.objects.filter(pk__in=list(pending)).update(
+            last_connection=Case(
+                *[
+                    When(
+                        Q(pk=user_id) & (Q(last_connection__isnull=True) | Q(last_connection__lt=timestamp)),
+                        then=Value(timestamp),
+                    )
+                    for user_id, timestamp in pending.items()
+                ],
+                default=F('last_connection'),
+                output_field=DateTimeField(),
+            )
+        )
+    except Exception as exc:
+        # Put the timestamps back for the next flush, unless newer ones arrived
+        with _pending_lock:
+            for user_id, timestamp in pending.items():
+                _pending.setdefault(user_id, timestamp)
+        logger.error(f"Failed to flush last connections: {exc}", exc_info=True)
+        return 0
+
+
+atexit.register(flush_connections)
@@ -0,0 +1,33 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from users.services import SignupService
+
+
+class Command(BaseCommand):
+    help = "Register users in bulk from a CSV file with a header row of signup fields."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with username, email, phone_number, password, transactional_password and optional first_name, last_name, gender, invitation_code columns.")
+        parser.add_argument("--report", help="Write the per-row result to this CSV file.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as source:
+                report = SignupService().bulk_signup(csv.DictReader(source))
+        except OSError as error:
+            raise CommandError(f"Could not read {options['path']}: {error}")
+
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as target:
+                writer = csv.writer(target)
+                writer.writerow(["row", "username", "status", "error"])
+                for row_number, username, error in report:
+                    writer.writerow([row_number, username, "failed" if error else "created", error or ""])
+        else:
+            for row_number, username, error in report:
+                if error:
+                    self.stdout.write(self.style.WARNING(f"Row {row_number} ({username}): {error}"))
+
+        created = sum(1 for _, _, error in report if error is None)
+        self.stdout.write(self.style.SUCCESS(f"{created} users created, {len(report) - created} rows failed."))
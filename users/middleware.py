@@ -1,5 +1,10 @@
-from datetime import datetime
-from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .auth_cache import get_cached_user
+from .last_connection import record_connection
 
 
 class UpdateLastConnectionMiddleware:
@@ -13,20 +18,40 @@ class UpdateLastConnectionMiddleware:
     def __call__(self, request):
         # Update last_connection only for authenticated users
         if request.user.is_authenticated:
-            request.user.last_connection = now()
-            request.user.save(update_fields=['last_connection'])
+            record_connection(request.user)
 
         response = self.get_response(request)
         return response
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.utils.timezone import now
 
 class CustomJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
         user = super().authenticate(request)
         if user and user[0]:  # user[0] is the User instance
             if not user[0].is_staff:
-                user[0].last_connection = now()
-                user[0].save(update_fields=['last_connection'])
-        return user
\ No newline at end of file
+                record_connection(user[0])
+        return user
+
+    def get_user(self, validated_token):
+        """
+        Resolve the token's user, with their wallet and pack, from the cache.
+        Every user or wallet save invalidates the entry, so deactivated users are rejected straight away.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = get_cached_user(user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if getattr(api_settings, "CHECK_REVOKE_TOKEN", False):
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
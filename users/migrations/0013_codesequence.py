@@ -0,0 +1,54 @@
+# Generated by Django 3.2.21 on 2026-10-17 06:18
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def create_code_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE SEQUENCE IF NOT EXISTS users_code_seq')
+
+
+def drop_code_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP SEQUENCE IF EXISTS users_code_seq')
+
+
+def reissue_duplicate_codes(apps, schema_editor):
+    """
+    Give a new code to every row sharing its code with an older row,
+    so the unique indexes can be added. Duplicated codes could not be redeemed before.
+    """
+    from users.codes import allocate_codes, REFERRAL_CODE, INVITATION_CODE
+
+    for model_name, field, kind in (
+        ('User', 'referral_code', REFERRAL_CODE),
+        ('InvitationCode', 'invitation_code', INVITATION_CODE),
+    ):
+        model = apps.get_model('users', model_name)
+        duplicated = (
+            model.objects.values(field).annotate(total=Count('id')).filter(total__gt=1).values_list(field, flat=True)
+        )
+        for code in list(duplicated):
+            rows = list(model.objects.filter(**{field: code}).order_by('id').values_list('id', flat=True))[1:]
+            for row_id, new_code in zip(rows, allocate_codes(kind, len(rows))):
+                model.objects.filter(id=row_id).update(**{field: new_code})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_code_sequence, drop_code_sequence),
+        migrations.RunPython(reissue_duplicate_codes, migrations.RunPython.noop),
+    ]
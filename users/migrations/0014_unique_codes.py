@@ -0,0 +1,23 @@
+# Generated by Django 3.2.21 on 2026-10-17 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_codesequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invitationcode',
+            name='invitation_code',
+            field=models.CharField(editable=False, max_length=6, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='referral_code',
+            field=models.CharField(editable=False, max_length=6, unique=True),
+        ),
+    ]
@@ -1,10 +1,11 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
 
 from shared.enums import GenderEnum
-from shared.helpers import generate_invitation_code
+from .codes import allocate_code, allocate_codes, REFERRAL_CODE, INVITATION_CODE
 
 class UserQuerySet(models.QuerySet):
     """
@@ -88,7 +89,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     referral_code = models.CharField(
         max_length=6,
-        unique=False,
+        unique=True,
         blank=False,
         null=False,
         editable=False
@@ -136,9 +137,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     EMAIL_FIELD = "email"
     REQUIRED_FIELDS = ["email"]
 
+    class Meta:
+        indexes = [
+            # Case-insensitive email lookups at login
+            models.Index(Lower('email'), name='users_user_email_lower_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.referral_code:
-            self.referral_code = generate_invitation_code()
+            self.referral_code = allocate_code(REFERRAL_CODE)
         super().save(*args, **kwargs)
 
     def check_transactional_password(self,transactional_password):
@@ -174,7 +181,7 @@ class Invitation(models.Model):
 class InvitationCode(models.Model):
     invitation_code = models.CharField(
         max_length=6,
-        unique=False,
+        unique=True,
         blank=False,
         null=False,
         editable=False
@@ -184,5 +191,22 @@ class InvitationCode(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.invitation_code:
-            self.invitation_code = generate_invitation_code()
-        super().save(*args, **kwargs)
\ No newline at end of file
+            self.invitation_code = allocate_code(INVITATION_CODE)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def generate_codes(cls, count):
+        """
+        Create `count` invitation codes with one sequence reservation and a bulk insert.
+        The allocator guarantees the codes are unique. Returns the created instances.
+        """
+        codes = [cls(invitation_code=code) for code in allocate_codes(INVITATION_CODE, count)]
+        with transaction.atomic():
+            return cls.objects.bulk_create(codes, batch_size=1000)
+
+
+class CodeSequence(models.Model):
+    """
+    Counter backing the referral and invitation code allocator on databases without sequences.
+    """
+    next_value = models.BigIntegerField(default=0)
@@ -5,18 +5,20 @@ from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
 
 from .models import Invitation,InvitationCode
-from wallet.models import Wallet,OnHoldPay
+from .services import SignupService, SignupError
+from .codes import find_code_owner
+from wallet.models import Wallet,OnHoldPay,BalanceAdjustment
+from wallet.services import BalanceAdjustmentService
 from wallet.serializers import WalletSerializer
-from administration.serializers import SettingsSerializer
-from shared.helpers import get_settings
+from shared.helpers import STREAM_FORMATS, get_settings_data, get_today
 from shared.mixins import AdminPasswordMixin
 from game.models import Product,Game
-from django.utils.timezone import now, timedelta
+from administration.models import DashboardRollup
 from django.db.models import Q
-from django.db.models.functions import ExtractMonth, ExtractYear
-from django.db.models import Count
 from finances.models import PaymentMethod
 from finances.serializers import PaymentMethodSerializer
+import csv
+import io
 import random
 
 
@@ -40,18 +42,19 @@ class UserSignupSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'phone_number', 'password', 'first_name', 'last_name', 'gender', 'transactional_password','invitation_code','referral_code','profile_picture']
         extra_kwargs = {
             'password': {'write_only': True},
-            'transactional_password': {'write_only': True}
+            'transactional_password': {'write_only': True},
+            # Uniqueness is checked for all three fields in one query in validate()
+            'username': {'validators': []},
+            'email': {'validators': []},
+            'phone_number': {'validators': []},
         }
         read_only_fields = ['referral_code','profile_picture']
 
     def validate_email(self, value):
         """
-        Validate and normalize the email address.
+        Normalize the email address.
         """
-        email = value.lower()
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError({"email": "A user with this email already exists."})
-        return email
+        return value.lower()
 
     def validate_transactional_password(self,value):
         if len(value) < 4:
@@ -61,31 +64,35 @@ class UserSignupSerializer(serializers.ModelSerializer):
         return value
 
 
-    def validate_username(self, value):
-        """
-        Validate the username for uniqueness.
+    def validate(self, attrs):
         """
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError({"username": "A user with this username already exists."})
-        return value
+        Check that the username, email and phone number are all unused, in a single query.
+        """
+        username, email, phone_number = attrs.get('username'), attrs.get('email'), attrs.get('phone_number')
+        errors = {}
+        for existing in User.objects.filter(
+            Q(username=username) | Q(email=email) | Q(phone_number=phone_number)
+        ).values('username', 'email', 'phone_number'):
+            if existing['username'] == username:
+                errors['username'] = "A user with this username already exists."
+            if existing['email'] == email:
+                errors['email'] = "A user with this email already exists."
+            if existing['phone_number'] == phone_number:
+                errors['phone_number'] = "A user with this phone number already exists."
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
     
     def validate_invitation_code(self, value):
         """
         Validate the invitation code.
         """
-        # print("the code is here ",value)
-        try:
-            referrer = User.objects.get(referral_code=value) 
-            return referrer
-        except User.DoesNotExist:
-            try:
-                code = InvitationCode.objects.get(invitation_code=value)
-                if code.is_used:
-                    raise serializers.ValidationError("The invitation code has been used")
-                else:
-                    return code
-            except InvitationCode.DoesNotExist:
-                raise serializers.ValidationError("Invalid invitation code.")
+        owner = find_code_owner(value)
+        if owner is None:
+            raise serializers.ValidationError("Invalid invitation code.")
+        if isinstance(owner, InvitationCode) and owner.is_used:
+            raise serializers.ValidationError("The invitation code has been used")
+        return owner
 
     def create(self, validated_data):
         """
@@ -94,17 +101,12 @@ class UserSignupSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password')
 
         referrer = validated_data.pop('invitation_code')
-        
-        user = User.objects.create_user(password=password, **validated_data)
 
-        # Create the invitation entry
-        if isinstance(referrer,User):
-            Invitation.objects.create(referral=referrer, user=user)
-        if isinstance(referrer, InvitationCode):
-            referrer.is_used = True
-            referrer.save()
-
-        return user
+        # Create the user, wallet and invitation entry in one transaction
+        try:
+            return SignupService().signup(password, referrer=referrer, **validated_data)
+        except SignupError as error:
+            raise serializers.ValidationError({error.field: error.message})
 
 
 class UserLoginSerializer(BaseAuthSerializer, serializers.ModelSerializer):
@@ -143,11 +145,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ref_name = "UserProfileSerializer "
     
     def get_settings(self,obj):
-        instance = get_settings()
-        if not instance:
+        data = get_settings_data()
+        if data is None:
             raise NotFound(detail="Settings not found.")
-        serializer = SettingsSerializer(instance=instance)
-        return serializer.data
+        return data
 
 class UserPartialSerilzer(serializers.ModelSerializer):
     class Meta:
@@ -233,6 +234,14 @@ class InvitationCodeSerializer(serializers.ModelSerializer):
         fields = ['id', 'invitation_code', 'is_used', 'created_at'] 
 
 
+class InvitationCodeBulkSerializer(serializers.Serializer):
+    """
+    Serializer for generating invitation codes in bulk.
+    """
+    count = serializers.IntegerField(min_value=1, max_value=10000, help_text="Number of codes to generate, up to 10000.")
+    format = serializers.ChoiceField(choices=STREAM_FORMATS, default="csv", help_text="Format of the returned list.")
+
+
 
 # ----------------------------------- Admin Serializers -----------------------------------------
 
@@ -255,93 +264,54 @@ class DashboardSerializer(serializers.Serializer):
         # Replace with actual logic to calculate active users
         return Product.objects.count()
 
+    def get_rollups(self):
+        """
+        This year's dashboard rollups by date, read once per serialization.
+        """
+        if not hasattr(self, '_rollups'):
+            self._rollups = DashboardRollup.get_year(get_today().year)
+        return self._rollups
+
+    def get_today_rollup(self, field):
+        rollup = self.get_rollups().get(get_today())
+        return getattr(rollup, field) if rollup else 0
+
+    def get_monthly_rollup(self, field):
+        """
+        Sum a rollup counter per month for the current year, up to the current month.
+        """
+        result = {month: 0 for month in range(1, get_today().month + 1)}
+        for day, rollup in self.get_rollups().items():
+            if day.month in result:
+                result[day.month] += getattr(rollup, field)
+        return result
+
     def get_total_submissions(self, obj):
-        # Calculate the start of today
-        start_of_today = now().replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_today = start_of_today + timedelta(days=1)
-
-        # Query to count games created today with `played=True` or `pending=True`
-        count = Game.objects.filter(
-            updated_at__gte=start_of_today,  # From start of today
-            updated_at__lt=end_of_today,    # Until the end of today
-            is_active=True
-        ).filter(
-            Q(played=True) | Q(pending=True)  # Either played or pending
-        ).count()
-        return count
-    
-    def get_total_users_login_today(self, obj):
         """
-        Count the total number of users who logged in today based on their `last_connection` field.
+        Count today's submissions (games played or put on hold) from the rollups.
         """
-        # Calculate the start and end of today
-        start_of_today = now().replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_today = start_of_today + timedelta(days=1)
+        return self.get_today_rollup('submissions')
 
-        # Filter users whose last_connection is within today's range
-        return User.objects.users().filter(
-            last_connection__gte=start_of_today,
-            last_connection__lt=end_of_today,
-        ).count()
+    def get_total_users_login_today(self, obj):
+        """
+        Count the users who logged in today from the rollups.
+        The first connection of each day is recorded immediately, so buffered ones don't change the count.
+        """
+        return self.get_today_rollup('logins')
 
     def get_user_registrations_per_month(self, obj):
         """
         Get the number of users registered per month for the current year,
         up to the current month.
         """
-        current_year = now().year
-        current_month = now().month
-
-        # Aggregate data grouped by month
-        registrations = User.objects.filter(
-            date_joined__year=current_year
-        ).annotate(
-            month=ExtractMonth('date_joined')  # Extract month from date_joined
-        ).values(
-            'month'
-        ).annotate(
-            count=Count('id')  # Count users for each month
-        ).order_by('month')
+        return self.get_monthly_rollup('registrations')
 
-        # Initialize all months up to the current month with 0
-        result = {month: 0 for month in range(1, current_month + 1)}
-
-        # Update the result with actual counts
-        for reg in registrations:
-            if reg['month'] <= current_month:  # Ensure only months up to the current month are included
-                result[reg['month']] = reg['count']
-
-        return result
-        
     def get_total_submissions_per_month(self, obj):
         """
         Get the total number of submissions per month for the current year.
         Includes submissions where played=True or pending=True.
         """
-        current_year = now().year
-        current_month = now().month
-
-        # Query for submissions grouped by month
-        submissions = Game.objects.filter(
-            updated_at__year=current_year,  # Filter by current year
-            is_active=True
-        ).filter(
-            Q(played=True) | Q(pending=True)  # Filter for played or pending
-        ).annotate(
-            month=ExtractMonth('updated_at')  # Group by month
-        ).values(
-            'month'
-        ).annotate(
-            count=Count('id')  # Count games for each month
-        ).order_by('month')
-
-        # Format the result for only the months up to the current month
-        result = {month: 0 for month in range(1, current_month + 1)}
-        for submission in submissions:
-            if submission['month'] <= current_month:  # Ensure only months up to the current month are included
-                result[submission['month']] = submission['count']
-
-        return result
+        return self.get_monthly_rollup('submissions')
 
 
 class AdminAuthSerializer:
@@ -396,19 +366,28 @@ class UserProfileListSerializer(serializers.ModelSerializer):
         read_only_fields = ['date_joined','referral_code',]
 
     def get_total_play(self,obj):
+        games_played_today = getattr(obj, 'games_played_today', None)
+        if games_played_today is not None:
+            return games_played_today
         return Game.count_games_played_today(obj)
 
     def get_total_available_play(self,obj):
         try:
             wallet = obj.wallet
-            return wallet.package.daily_missions
+            return wallet.cached_package.daily_missions
         except Wallet.DoesNotExist:
             return None
 
     def get_total_negative_product_submitted(self,obj):
+        total = getattr(obj, 'total_negative_product_submitted', None)
+        if total is not None:
+            return total
         return Game.objects.filter(user=obj,special_product=True,played=True,is_active=True).count()
 
     def get_total_product_submitted(Self,obj):
+        total = getattr(obj, 'total_product_submitted', None)
+        if total is not None:
+            return total
         return Game.objects.filter(user=obj,played=True,is_active=True).count()
 
 class AdminUserUpdateSerializer:
@@ -441,71 +420,61 @@ class AdminUserUpdateSerializer:
             user.save()
             return user
         
-    class UserBalance(AdminPasswordMixin,serializers.Serializer):
-        user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(),required=True)
-        balance = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)
-        reason = serializers.CharField(required=True)
+    class WalletValue(AdminPasswordMixin,serializers.Serializer):
+        """
+        Base for the serializers that set one wallet value of a user.
+        The change and its reason are recorded in the BalanceAdjustment log.
+        """
+        wallet_field = None
+        value_field = None
 
         def save(self):
             """
-            Update the balance for the given user and record the reason.
+            Set the wallet value for the given user and record the reason.
             """
             user = self.validated_data['user']
-            new_balance = self.validated_data['balance']
-            reason = self.validated_data['reason']
-            try:
-                wallet = user.wallet
-            except Wallet.DoesNotExist:
-                wallet = Wallet.objects.create(user=user)
-            wallet.balance = new_balance
-            user.save()
-            wallet.save()
+            BalanceAdjustmentService(admin=self.context['request'].user).adjust([(
+                user.pk, self.wallet_field, self.validated_data[self.value_field], self.validated_data['reason'],
+            )])
+            return User.objects.select_related('wallet').get(pk=user.pk)
 
-            return user
-        
-    class UserProfit(AdminPasswordMixin,serializers.Serializer):
+    class UserBalance(WalletValue):
+        user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(),required=True)
+        balance = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)
+        reason = serializers.CharField(required=True)
+        wallet_field = BalanceAdjustment.BALANCE
+        value_field = 'balance'
+
+    class UserProfit(WalletValue):
         user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(),required=True)
         profit = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)
         reason = serializers.CharField(required=True)
+        wallet_field = BalanceAdjustment.COMMISSION
+        value_field = 'profit'
 
-        def save(self):
-            """
-            Update the balance for the given user and record the reason.
-            """
-            user = self.validated_data['user']
-            new_balance = self.validated_data['profit']
-            reason = self.validated_data['reason']
-            try:
-                wallet = user.wallet
-            except Wallet.DoesNotExist:
-                wallet = Wallet.objects.create(user=user)
-            wallet.commission = new_balance
-            user.save()
-            wallet.save()
-            
-            return user
-        
-    class UserSalary(AdminPasswordMixin,serializers.Serializer):
+    class UserSalary(WalletValue):
         user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(),required=True)
         salary = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)
         reason = serializers.CharField(required=True)
+        wallet_field = BalanceAdjustment.SALARY
+        value_field = 'salary'
+
+    class BulkAdjustment(AdminPasswordMixin,serializers.Serializer):
+        file = serializers.FileField(
+            required=True,
+            help_text="CSV with a header row of user_id or username (or user, for either), field (balance, commission or salary), value and reason.",
+        )
 
         def save(self):
             """
-            Update the salary for the given user and record the reason.
+            Apply every valid row of the uploaded file in one transaction.
+            Returns a list of (row_number, user, field, error) tuples, where error is None for applied rows.
             """
-            user = self.validated_data['user']
-            new_balance = self.validated_data['salary']
-            reason = self.validated_data['reason']
+            source = io.TextIOWrapper(self.validated_data['file'], encoding='utf-8-sig', newline='')
             try:
-                wallet = user.wallet
-            except Wallet.DoesNotExist:
-                wallet = Wallet.objects.create(user=user)
-            wallet.salary = new_balance
-            user.save()
-            wallet.save()
-            
-            return user
+                return BalanceAdjustmentService(admin=self.context['request'].user).bulk_adjust(csv.DictReader(source))
+            except UnicodeDecodeError:
+                raise serializers.ValidationError({"file": "The file must be UTF-8 encoded CSV."})
 
     class UserProfile(serializers.Serializer):
         user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(),required=True)
@@ -535,7 +504,8 @@ class AdminUserUpdateSerializer:
             try:
                 method = obj.payment_method
             except PaymentMethod.DoesNotExist:
-                method = PaymentMethod.objects.create(user=obj)
+                # Show an empty method without creating it; the user's payment endpoint creates it on first use
+                method = PaymentMethod(user=obj)
 
             return PaymentMethodSerializer(instance=method).data
 
@@ -0,0 +1,231 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from administration.models import DashboardRollup
+from game.models import UserGameStats
+from notification.models import Notification
+from packs.tiers import get_pack_for_balance
+from shared.helpers import get_settings
+from wallet.models import Wallet
+from .codes import allocate_codes, REFERRAL_CODE
+from .models import Invitation, InvitationCode
+
+User = get_user_model()
+
+# Rows inserted per transaction by the bulk import
+SIGNUP_BATCH_SIZE = 500
+
+# Columns read from each imported row
+IMPORT_FIELDS = [
+    'username', 'email', 'phone_number', 'password', 'first_name', 'last_name',
+    'gender', 'transactional_password', 'invitation_code',
+]
+
+
+class SignupError(Exception):
+    """
+    Raised when a signup can't be completed, with the field it relates to.
+    """
+
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+        self.message = message
+
+
+class SignupService:
+    """
+    Service to register users together with their wallet, signup bonus,
+    invitation and notification in one transaction.
+
+    The signup bonus and the pack it qualifies for are resolved once per
+    service instance, so a bulk import reuses them for every row.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.signup_bonus = Decimal(settings.bonus_when_registering) if settings else Decimal("0.00")
+        self.package = get_pack_for_balance(self.signup_bonus)
+
+    def build_user(self, password, **fields):
+        """
+        Return an unsaved user with a hashed password and the signup bonus recorded.
+        """
+        user = User(
+            username=fields.pop('username').strip(),
+            email=fields.pop('email').strip().lower(),
+            **fields,
+        )
+        user.password = make_password(password)
+        user.is_reg_balance_add = True
+        user.reg_balance_amount = self.signup_bonus
+        # The wallet and game stats are created here, not by the post_save signals
+        user._created_by_signup = True
+        return user
+
+    def build_wallet(self, user):
+        return Wallet(user=user, balance=self.signup_bonus, package=self.package)
+
+    def build_notification(self, user):
+        return Notification(
+            user=user,
+            title="Signup Bonus",
+            message=f"Successful registration! You have received a signup bonus of {self.signup_bonus} USD",
+            type=Notification.USER,
+        )
+
+    def signup(self, password, referrer=None, **fields):
+        """
+        Create a user, their wallet and the invitation records atomically.
+        `referrer` is the referring User or an unused InvitationCode.
+        Raises SignupError when the identifiers are taken or the code was used meanwhile.
+        """
+        user = self.build_user(password, **fields)
+        try:
+            with transaction.atomic():
+                user.save()
+                Wallet.objects.bulk_create([self.build_wallet(user)])
+                UserGameStats.objects.bulk_create([UserGameStats(user=user)])
+
+                if isinstance(referrer, User):
+                    Invitation.objects.create(referral=referrer, user=user)
+                elif isinstance(referrer, InvitationCode):
+                    # Claim the code only if no concurrent signup used it first
+                    if not InvitationCode.objects.filter(pk=referrer.pk, is_used=False).update(is_used=True):
+                        raise SignupError("invitation_code", "The invitation code has been used")
+                    referrer.is_used = True
+
+                if self.signup_bonus > 0:
+                    Notification.objects.bulk_create([self.build_notification(user)])
+        except IntegrityError:
+            raise SignupError("username", "A user with this username, email or phone number already exists.")
+        return user
+
+    def bulk_signup(self, rows):
+        """
+        Import users from an iterable of dicts with the signup fields and an
+        optional `invitation_code` (a user's referral code or an invitation code).
+
+        Rows are inserted in batches, each in one transaction with a handful
+        of bulk statements. Returns a list of (row_number, username, error)
+        tuples, where error is None for created users.
+        """
+        report = []
+        batch = []
+        for row_number, row in enumerate(rows, start=1):
+            batch.append((row_number, row))
+            if len(batch) >= SIGNUP_BATCH_SIZE:
+                report.extend(self._signup_batch(batch))
+                batch = []
+        if batch:
+            report.extend(self._signup_batch(batch))
+        return report
+
+    def _signup_batch(self, batch):
+        report = []
+        usernames = {row.get('username', '').strip() for _, row in batch}
+        emails = {row.get('email', '').strip().lower() for _, row in batch}
+        phone_numbers = {row.get('phone_number', '') for _, row in batch}
+        codes = {row.get('invitation_code') for _, row in batch if row.get('invitation_code')}
+
+        taken = set()
+        for username, email, phone_number in User.objects.filter(
+            Q(username__in=usernames) | Q(email__in=emails) | Q(phone_number__in=phone_numbers)
+        ).values_list('username', 'email', 'phone_number'):
+            taken.update({("username", username), ("email", email), ("phone_number", phone_number)})
+
+        referrers = {user.referral_code: user for user in User.objects.filter(referral_code__in=codes)}
+        invitation_codes = {
+            code.invitation_code: code
+            for code in InvitationCode.objects.filter(invitation_code__in=codes, is_used=False)
+        }
+
+        users, invitations, used_codes = [], [], []
+        for row_number, row in batch:
+            row = {key: row[key] for key in IMPORT_FIELDS if row.get(key) not in (None, "")}
+            code = row.pop('invitation_code', None)
+            password = row.pop('password', None)
+            missing = [field for field in ('username', 'email', 'phone_number', 'transactional_password') if not row.get(field)]
+            if missing or not password:
+                report.append((row_number, row.get('username'), f"Missing fields: {', '.join(missing or ['password'])}"))
+                continue
+
+            username = row['username'].strip()
+            identifiers = {
+                ("username", username),
+                ("email", row['email'].strip().lower()),
+                ("phone_number", row['phone_number']),
+            }
+            duplicate = sorted(field for field, _ in identifiers & taken)
+            if duplicate:
+                report.append((row_number, username, f"Already exists: {', '.join(duplicate)}"))
+                continue
+
+            referrer = None
+            if code:
+                referrer = referrers.get(code) or invitation_codes.get(code)
+                if referrer is None:
+                    report.append((row_number, username, "Invalid invitation code."))
+                    continue
+
+            user = self.build_user(password, **row)
+            try:
+                # The referral code is allocated for the whole batch at insert time
+                user.full_clean(exclude=['referral_code'], validate_unique=False)
+            except ValidationError as error:
+                report.append((row_number, username, "; ".join(
+                    f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items()
+                )))
+                continue
+
+            if isinstance(referrer, InvitationCode):
+                # Each invitation code can only be used once
+                del invitation_codes[code]
+            taken.update(identifiers)
+            users.append(user)
+            if isinstance(referrer, User):
+                invitations.append((user, referrer))
+            elif isinstance(referrer, InvitationCode):
+                used_codes.append(referrer.pk)
+            report.append((row_number, user.username, None))
+
+        if not users:
+            return report
+
+        try:
+            self._create_batch(users, invitations, used_codes)
+        except IntegrityError as error:
+            # A concurrent signup took one of the identifiers, nothing in the batch was saved
+            report = [
+                (row_number, username, message if message else f"Not imported, the batch failed: {error}")
+                for row_number, username, message in report
+            ]
+        return report
+
+    def _create_batch(self, users, invitations, used_codes):
+        for user, referral_code in zip(users, allocate_codes(REFERRAL_CODE, len(users))):
+            user.referral_code = referral_code
+        with transaction.atomic():
+            created = User.objects.bulk_create(users)
+            if created[0].pk is None:
+                # Backends that cannot return ids from a bulk insert
+                ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'id'))
+                for user in created:
+                    user.pk = user.id = ids[user.username]
+
+            Wallet.objects.bulk_create([self.build_wallet(user) for user in created])
+            UserGameStats.objects.bulk_create([UserGameStats(user=user) for user in created])
+            Invitation.objects.bulk_create([
+                Invitation(referral=referrer, user=user) for user, referrer in invitations
+            ])
+            if used_codes:
+                InvitationCode.objects.filter(pk__in=used_codes).update(is_used=True)
+            if self.signup_bonus > 0:
+                Notification.objects.bulk_create([self.build_notification(user) for user in created])
+            # Bulk inserts don't send post_save, so the dashboard is updated here
+            DashboardRollup.record(registrations=len(created))
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from wallet.models import Wallet
+from .auth_cache import clear_cached_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def clear_cached_user_on_user_change(sender, instance, **kwargs):
+    """
+    Signal to invalidate the cached authentication entry whenever a user changes,
+    including when they are deactivated.
+    """
+    clear_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def clear_cached_user_on_wallet_change(sender, instance, **kwargs):
+    """
+    Signal to invalidate the owner's cached authentication entry whenever their wallet changes.
+    """
+    clear_cached_user(instance.user_id)
@@ -1,3 +1,323 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from administration.models import DashboardRollup
+from notification.models import Notification
+from shared.testing import CacheResetTestCase, create_admin, create_settings, create_user
+from wallet.models import Wallet
+from . import last_connection
+from .codes import CODE_LENGTH, INVITATION_CODE, REFERRAL_CODE, allocate_codes, find_code_owner, get_code_kind
+from .last_connection import flush_connections, record_connection
+from .models import Invitation, InvitationCode
+from .services import SignupError, SignupService
+
+User = get_user_model()
+
+
+class LastConnectionTestCase(CacheResetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("visitor")
+        User.objects.filter(pk=self.user.pk).update(last_connection=now() - timedelta(days=2))
+
+    def test_first_request_of_the_day_is_counted_once_across_workers(self):
+        # Two workers load the user before either records the connection
+        first_worker, second_worker = User.objects.get(pk=self.user.pk), User.objects.get(pk=self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_connection(first_worker)
+            cache.clear()
+            record_connection(second_worker)
+
+        self.assertEqual(DashboardRollup.objects.get().logins, 1)
+
+    def test_flush_never_moves_the_last_connection_back(self):
+        latest = now()
+        User.objects.filter(pk=self.user.pk).update(last_connection=latest)
+        last_connection._pending[self.user.pk] = latest - timedelta(minutes=5)
+
+        flush_connections()
+
+        self.assertEqual(User.objects.get(pk=self.user.pk).last_connection, latest)
+
+
+class CachedAuthenticationTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("member")
+
+    def count_queries(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/withdrawals/withdrawal_history/")
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_a_cached_token_user_costs_no_queries_on_the_configured_cache(self):
+        token_client = APIClient()
+        token_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        forced_client = APIClient()
+        forced_client.force_authenticate(user=self.user)
+        # Load the user into the cache and record today's connection
+        with self.captureOnCommitCallbacks(execute=True):
+            self.count_queries(token_client)
+
+        self.assertEqual(self.count_queries(token_client), self.count_queries(forced_client))
+
+
+class EmailOrUsernameBackendTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("member", email="Member@Example.com")
+
+    def test_email_login_is_case_insensitive_and_runs_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate(username="member@EXAMPLE.com", password="password"), self.user)
+
+    def test_username_login_runs_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate(username="member", password="password"), self.user)
+
+    def test_a_username_containing_an_at_sign_can_log_in_in_one_query(self):
+        user = create_user("odd@name", email="odd@example.com")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate(username="odd@name", password="password"), user)
+
+    def test_wrong_password_is_rejected(self):
+        self.assertIsNone(authenticate(username="member@example.com", password="wrong"))
+
+    def test_unknown_identifiers_still_hash_the_password(self):
+        for identifier in ("nobody", "nobody@example.com"):
+            with self.subTest(identifier=identifier), mock.patch.object(User, "set_password") as set_password:
+                with self.assertNumQueries(1):
+                    self.assertIsNone(authenticate(username=identifier, password="password"))
+                set_password.assert_called_once_with("password")
+
+
+class SignupServiceTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_settings(bonus_when_registering=Decimal("5.00"))
+        cls.existing = create_user("existing")
+
+    def signup_fields(self, index):
+        return {
+            "username": f"new{index}",
+            "email": f"new{index}@example.com",
+            "phone_number": f"200000000{index}",
+            "transactional_password": "1234",
+        }
+
+    def row(self, index, **fields):
+        return {**self.signup_fields(index), "password": "password", **fields}
+
+    def test_signup_creates_the_user_wallet_bonus_and_invitation(self):
+        user = SignupService().signup("password", referrer=self.existing, **self.signup_fields(1))
+
+        self.assertEqual(Wallet.objects.get(user=user).balance, Decimal("5.00"))
+        self.assertTrue(Invitation.objects.filter(referral=self.existing, user=user).exists())
+        self.assertTrue(Notification.objects.filter(user=user, title="Signup Bonus").exists())
+
+    def test_a_failed_signup_leaves_nothing_behind(self):
+        fields = {**self.signup_fields(1), "phone_number": self.existing.phone_number}
+        users_before = User.objects.count()
+
+        with self.assertRaises(SignupError):
+            SignupService().signup("password", **fields)
+
+        self.assertEqual(User.objects.count(), users_before)
+        self.assertFalse(Wallet.objects.filter(user__username="new1").exists())
+        self.assertFalse(Notification.objects.filter(user__username="new1").exists())
+
+    def test_an_invitation_code_can_only_be_used_once(self):
+        code = InvitationCode.objects.create()
+        SignupService().signup("password", referrer=code, **self.signup_fields(1))
+
+        with self.assertRaises(SignupError) as raised:
+            SignupService().signup("password", referrer=code, **self.signup_fields(2))
+
+        self.assertEqual(raised.exception.field, "invitation_code")
+        self.assertFalse(User.objects.filter(username="new2").exists())
+
+    def test_bulk_signup_reports_duplicates_and_reused_invitation_codes(self):
+        code = InvitationCode.objects.create()
+
+        report = SignupService().bulk_signup([
+            self.row(1, invitation_code=code.invitation_code),
+            self.row(2, invitation_code=code.invitation_code),
+            self.row(3, username="existing"),
+            self.row(4, email="EXISTING@example.com"),
+            self.row(5, phone_number="2000000001"),
+            self.row(6, invitation_code=self.existing.referral_code),
+        ])
+
+        self.assertEqual(report, [
+            (1, "new1", None),
+            (2, "new2", "Invalid invitation code."),
+            (3, "existing", "Already exists: username"),
+            (4, "new4", "Already exists: email"),
+            (5, "new5", "Already exists: phone_number"),
+            (6, "new6", None),
+        ])
+        self.assertEqual(
+            set(Wallet.objects.filter(user__username__startswith="new").values_list("user__username", flat=True)),
+            {"new1", "new6"},
+        )
+        self.assertTrue(InvitationCode.objects.get(pk=code.pk).is_used)
+        self.assertTrue(Invitation.objects.filter(referral=self.existing, user__username="new6").exists())
+
+    def test_a_failed_bulk_batch_is_rolled_back_and_reported(self):
+        with mock.patch.object(Notification.objects, "bulk_create", side_effect=IntegrityError("conflict")):
+            report = SignupService().bulk_signup([self.row(1), self.row(2)])
+
+        self.assertTrue(all(error.startswith("Not imported") for _, _, error in report))
+        self.assertFalse(User.objects.filter(username__startswith="new").exists())
+        self.assertFalse(Wallet.objects.filter(user__username__startswith="new").exists())
+
+    def test_import_users_command_writes_a_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source, target = os.path.join(directory, "users.csv"), os.path.join(directory, "report.csv")
+            with open(source, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=list(self.row(1)))
+                writer.writeheader()
+                writer.writerows([self.row(1), self.row(2, username="existing")])
+
+            call_command("import_users", source, "--report", target, stdout=StringIO())
+
+            with open(target, newline="") as file:
+                rows = list(csv.DictReader(file))
+
+        self.assertEqual([(row["username"], row["status"]) for row in rows], [("new1", "created"), ("existing", "failed")])
+        self.assertTrue(User.objects.filter(username="new1").exists())
+
+
+class CodeAllocationTestCase(CacheResetTestCase):
+
+    def test_allocated_codes_are_unique_with_a_fixed_length_across_both_kinds(self):
+        referral_codes = allocate_codes(REFERRAL_CODE, 500)
+        invitation_codes = allocate_codes(INVITATION_CODE, 500)
+        codes = referral_codes + invitation_codes
+
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertTrue(all(len(code) == CODE_LENGTH for code in codes))
+        self.assertEqual({get_code_kind(code) for code in referral_codes}, {REFERRAL_CODE})
+        self.assertEqual({get_code_kind(code) for code in invitation_codes}, {INVITATION_CODE})
+
+    def test_find_code_owner_resolves_allocated_and_legacy_codes(self):
+        user = create_user("referrer")
+        legacy_user = create_user("legacy", referral_code="QWERTY")
+        invitation = InvitationCode.objects.create()
+        legacy_invitation = InvitationCode.objects.create(invitation_code="ZXCVBN")
+
+        self.assertEqual(find_code_owner(user.referral_code), user)
+        self.assertEqual(find_code_owner("QWERTY"), legacy_user)
+        self.assertEqual(find_code_owner(invitation.invitation_code), invitation)
+        self.assertEqual(find_code_owner("ZXCVBN"), legacy_invitation)
+        self.assertIsNone(find_code_owner("NOCODE"))
+
+
+class GenerateInvitationCodesTestCase(CacheResetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def generate(self, **data):
+        return self.client.post("/auth/invitation-codes/generate-codes/", data, format="json")
+
+    def test_codes_are_created_and_listed_as_csv(self):
+        response = self.generate(count=25)
+
+        self.assertEqual(response.status_code, 201)
+        rows = list(csv.DictReader(StringIO(b"".join(response.streaming_content).decode())))
+        codes = [row["invitation_code"] for row in rows]
+        self.assertEqual(len(set(codes)), 25)
+        self.assertEqual(set(InvitationCode.objects.values_list("invitation_code", flat=True)), set(codes))
+        self.assertEqual({row["is_used"] for row in rows}, {"False"})
+
+    def test_codes_can_be_listed_as_ndjson(self):
+        response = self.generate(count=3, format="ndjson")
+
+        self.assertEqual(response.status_code, 201)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(all(get_code_kind(row["invitation_code"]) == INVITATION_CODE for row in rows))
+
+    def test_repeated_batches_never_reuse_a_code(self):
+        for _ in range(3):
+            self.generate(count=200)
+
+        codes = list(InvitationCode.objects.values_list("invitation_code", flat=True))
+        self.assertEqual(len(codes), 600)
+        self.assertEqual(len(set(codes)), 600)
+
+    def test_the_count_is_capped(self):
+        for count in (0, 10001):
+            with self.subTest(count=count):
+                self.assertEqual(self.generate(count=count).status_code, 400)
+        self.assertEqual(self.generate(count=3, format="xml").status_code, 400)
+        self.assertFalse(InvitationCode.objects.exists())
+
+
+class ReissueDuplicateCodesTestCase(TransactionTestCase):
+    before_unique_codes = [("users", "0013_codesequence")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before_unique_codes)
+        self.apps = executor.loader.project_state(self.before_unique_codes).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicate_codes_are_reissued(self):
+        HistoricalUser = self.apps.get_model("users", "User")
+        HistoricalInvitationCode = self.apps.get_model("users", "InvitationCode")
+        for index in range(3):
+            HistoricalUser.objects.create(
+                username=f"user{index}",
+                email=f"user{index}@example.com",
+                phone_number=f"100000000{index}",
+                referral_code="SAMEAA",
+            )
+            HistoricalInvitationCode.objects.create(invitation_code="SAMEBB")
+        HistoricalInvitationCode.objects.create(invitation_code="UNIQUE")
+
+        import_module("users.migrations.0013_codesequence").reissue_duplicate_codes(self.apps, None)
+
+        referral_codes = list(HistoricalUser.objects.order_by("id").values_list("referral_code", flat=True))
+        invitation_codes = list(
+            HistoricalInvitationCode.objects.order_by("id").values_list("invitation_code", flat=True)
+        )
+        self.assertEqual(len(set(referral_codes)), 3)
+        self.assertEqual(referral_codes[0], "SAMEAA")
+        self.assertEqual(len(set(invitation_codes)), 4)
+        self.assertEqual([invitation_codes[0], invitation_codes[-1]], ["SAMEBB", "UNIQUE"])
@@ -11,11 +11,11 @@ from .serializers import (
     ChangePasswordSerializer,
     ChangeTransactionalPasswordSerializer,
     InvitationCodeSerializer,
+    InvitationCodeBulkSerializer,
     AdminAuthSerializer
 )
-from administration.serializers import SettingsSerializer
 from rest_framework.exceptions import NotFound
-from shared.helpers import get_settings
+from shared.helpers import get_settings_data, stream_rows
 from rest_framework.decorators import api_view
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -316,14 +316,13 @@ class UserAuthViewSet(ViewSet):
         """
         Return all the site settings create by the admin
         """
-        instance = get_settings()
-        if not instance:
+        data = get_settings_data()
+        if data is None:
             raise NotFound(detail="Settings not found.")
-        serializer = SettingsSerializer(instance=instance)
         return Response(
             success=True,
             message="Settings Fetched successfully.",
-            data=serializer.data,
+            data=data,
             status_code=status.HTTP_200_OK
         )
     
@@ -352,6 +351,35 @@ class InvitationCodeViewSet(ViewSet):
             status_code=status.HTTP_201_CREATED
         )
 
+    @swagger_auto_schema(
+        request_body=InvitationCodeBulkSerializer,
+        responses={201: "The generated codes as a CSV or NDJSON download."},
+        operation_summary="Generate Invitation Codes in Bulk",
+        operation_description="Generate up to 10000 unique invitation codes at once and download them as CSV or NDJSON.",
+    )
+    @action(detail=False, methods=['post'], url_path='generate-codes')
+    def generate_invitation_codes(self, request):
+        """
+        Generate a batch of invitation codes and return the list as a download.
+        The codes are all created before the response starts.
+        """
+        serializer = InvitationCodeBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        codes = InvitationCode.generate_codes(serializer.validated_data['count'])
+        rows = (
+            {"invitation_code": code.invitation_code, "is_used": code.is_used, "created_at": code.created_at}
+            for code in codes
+        )
+        response = stream_rows(
+            rows,
+            ["invitation_code", "is_used", "created_at"],
+            format=serializer.validated_data['format'],
+            filename="invitation_codes",
+        )
+        response.status_code = status.HTTP_201_CREATED
+        return response
+
 class AdminAuthViewSet(ViewSet):
     """
     ViewSet for Admin-related operations, including login.
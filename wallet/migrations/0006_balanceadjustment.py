@@ -0,0 +1,33 @@
+# Generated by Django 3.2.21 on 2026-10-17 06:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('wallet', '0005_onholdpay'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceAdjustment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('balance', 'Balance'), ('commission', 'Profit'), ('salary', 'Salary')], max_length=20)),
+                ('old_value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('new_value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('reason', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='balance_adjustments_made', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_adjustments', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='balanceadjustment',
+            index=models.Index(fields=['user', '-created_at'], name='wallet_adjustment_user_idx'),
+        ),
+    ]
@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models import Exists, F, OuterRef
 from django.contrib.auth import get_user_model
+from django.utils.timezone import now
 from django.core.validators import MinValueValidator, MaxValueValidator
 from packs.models import Pack
+from packs.tiers import get_pack_for_balance, get_pack, get_pack_for_balance_expression
+from users.auth_cache import clear_cached_user
 from game.models import Game
 
 User = get_user_model()
@@ -85,7 +89,7 @@ class Wallet(models.Model):
             raise ValueError("Credit amount must be positive.")
         
         self.commission += amount
-        self.save()
+        self.save(update_fields=['commission', 'updated_at'])
 
     def debit_commission(self, amount):
         """
@@ -95,7 +99,7 @@ class Wallet(models.Model):
             raise ValueError("Credit amount must be positive.")
         
         self.commission -= amount
-        self.save()
+        self.save(update_fields=['commission', 'updated_at'])
 
     def debit(self, amount):
         """
@@ -132,34 +136,130 @@ class Wallet(models.Model):
         self.balance += amount
         self.save()
 
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded balance so save() only re-tiers when it changes
+        instance._loaded_balance = instance.__dict__.get('balance')
+        return instance
+
+    @property
+    def cached_package(self):
         """
-        Override save method to assign a Pack based on the wallet balance.
+        The wallet's Pack, read from the cached tier table instead of the database.
+        """
+        return get_pack(self.package_id)
+
+    @staticmethod
+    def get_package_for_balance(balance):
+        """
+        Return the highest active Pack the balance qualifies for,
+        falling back to the lowest active Pack.
+        """
+        return get_pack_for_balance(balance)
+
+    def settle(self, balance_delta=0, commission_delta=0, on_hold=None, update_pack=True):
+        """
+        Apply balance, commission and on-hold changes in a single UPDATE.
+        The caller must hold a row lock on the wallet (select_for_update).
         """
-        update_pack = Game.user_has_pending_game(self.user)
-        # Fetch all active packs ordered by their USD value in descending order
-        if not update_pack:
-            packs = Pack.objects.filter(is_active=True).order_by('-usd_value')
+        new_balance = self.balance + balance_delta
+        updates = {
+            'balance': F('balance') + balance_delta,
+            'commission': F('commission') + commission_delta,
+            'updated_at': now(),
+        }
+        if on_hold is not None:
+            updates['on_hold'] = on_hold
+        if update_pack:
+            self.package = self.get_package_for_balance(new_balance)
+            updates['package'] = self.package
+
+        Wallet.objects.filter(pk=self.pk).update(**updates)
+        clear_cached_user(self.user_id)
 
-            # Attempt to assign the highest suitable pack
-            assigned_pack = None
-            for pack in packs:
-                if self.balance >= pack.usd_value:
-                    assigned_pack = pack
-                    break
+        self.balance = new_balance
+        self._loaded_balance = new_balance
+        self.commission += commission_delta
+        if on_hold is not None:
+            self.on_hold = on_hold
+        self.updated_at = updates['updated_at']
 
-            # Fall back to the pack with the lowest value if no suitable pack was found
-            if not assigned_pack:
-                assigned_pack = Pack.objects.filter(is_active=True).order_by('usd_value').first()
+    @classmethod
+    def retier(cls, user_ids):
+        """
+        Re-assign the pack of the given users' wallets from their current balance in one UPDATE.
+        Like `save`, wallets of users with a pending game keep their pack.
+        """
+        package = get_pack_for_balance_expression()
+        if package is None:
+            return
+        cls.objects.filter(user_id__in=user_ids).filter(
+            ~Exists(Game.objects.filter(user=OuterRef('user'), played=False, pending=True, is_active=True))
+        ).update(package_id=package)
 
+    def save(self, *args, **kwargs):
+        """
+        Override save method to assign a Pack based on the wallet balance.
+        The pack is only re-evaluated when the balance changed since the wallet was loaded.
+        """
+        update_fields = kwargs.get('update_fields')
+        balance_changed = (
+            self._state.adding
+            or getattr(self, '_loaded_balance', None) != self.balance
+        ) and (update_fields is None or 'balance' in update_fields)
+
+        if balance_changed and not Game.user_has_pending_game(self.user_id):
             # Assign the selected pack to the instance
-            self.package = assigned_pack
+            self.package = self.get_package_for_balance(self.balance)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'package'}
 
         # Call the parent save method
         super().save(*args, **kwargs)
+        self._loaded_balance = self.balance
+
+
+class BalanceAdjustment(models.Model):
+    """
+    Append-only log of the wallet values set by admins, with the reason given.
+    """
+    BALANCE = 'balance'
+    COMMISSION = 'commission'
+    SALARY = 'salary'
+    FIELD_CHOICES = [
+        (BALANCE, 'Balance'),
+        (COMMISSION, 'Profit'),
+        (SALARY, 'Salary'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="balance_adjustments")
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    old_value = models.DecimalField(max_digits=12, decimal_places=2)
+    new_value = models.DecimalField(max_digits=12, decimal_places=2)
+    reason = models.TextField()
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="balance_adjustments_made"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='wallet_adjustment_user_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Balance adjustments can't be changed once recorded.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Balance adjustments can't be deleted.")
+
+    def __str__(self):
+        return f"{self.get_field_display()} of {self.user} set from {self.old_value} to {self.new_value}"
 
 
-        
 class OnHoldPay(models.Model):
     min_amount = models.DecimalField(
         max_digits=12,
@@ -5,7 +5,7 @@ from packs.serializers import PackProfileSerializer,PackSerializer
 class WalletSerializer:
 
     class UserWalletSerializer(serializers.ModelSerializer):
-        package = PackProfileSerializer(read_only=True)
+        package = PackProfileSerializer(source='cached_package', read_only=True)
         """
         Serializer for Wallet model.
         """
@@ -16,7 +16,7 @@ class WalletSerializer:
 
 
     class AdminUserWalletSerializer(serializers.ModelSerializer):
-        package = PackSerializer(read_only=True)
+        package = PackSerializer(source='cached_package', read_only=True)
         class Meta:
             model = Wallet
             fields = "__all__"
@@ -0,0 +1,166 @@
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.utils.timezone import now
+
+from packs.tiers import get_pack_for_balance
+from users.auth_cache import clear_cached_users
+from .models import BalanceAdjustment, Wallet
+
+User = get_user_model()
+
+# Rows applied per UPDATE by the bulk adjustment
+ADJUSTMENT_CHUNK_SIZE = 1000
+
+# Largest value the wallet amount columns (max_digits=12, decimal_places=2) can hold
+MAX_WALLET_VALUE = Decimal("9999999999.99")
+
+
+class BalanceAdjustmentService:
+    """
+    Service to set wallet balances, profits and salaries, recording each
+    change and its reason in the BalanceAdjustment log.
+
+    Changes are applied in chunks, each with one locking read, one UPDATE
+    and one log insert, all inside a single transaction.
+    """
+
+    def __init__(self, admin=None):
+        self.admin = admin
+
+    def adjust(self, adjustments):
+        """
+        Apply a list of (user id, field, value, reason) tuples in one transaction.
+        A user can appear once per field. Returns the recorded BalanceAdjustment entries.
+        """
+        entries = []
+        with transaction.atomic():
+            for start in range(0, len(adjustments), ADJUSTMENT_CHUNK_SIZE):
+                entries.extend(self._apply_chunk(adjustments[start:start + ADJUSTMENT_CHUNK_SIZE]))
+        return entries
+
+    def _apply_chunk(self, adjustments):
+        user_ids = list({user_id for user_id, _, _, _ in adjustments})
+
+        # Users created before wallets were created on signup may not have one yet
+        wallets = {wallet.user_id: wallet for wallet in Wallet.objects.select_for_update().filter(user_id__in=user_ids)}
+        missing = [user_id for user_id in user_ids if user_id not in wallets]
+        if missing:
+            package = get_pack_for_balance(Decimal("0.00"))
+            Wallet.objects.bulk_create([Wallet(user_id=user_id, package=package) for user_id in missing])
+            wallets.update({
+                wallet.user_id: wallet for wallet in Wallet.objects.select_for_update().filter(user_id__in=missing)
+            })
+
+        changes = {}
+        entries = []
+        for user_id, field, value, reason in adjustments:
+            changes.setdefault(field, []).append(When(user_id=user_id, then=Value(value)))
+            entries.append(BalanceAdjustment(
+                user_id=user_id,
+                field=field,
+                old_value=getattr(wallets[user_id], field),
+                new_value=value,
+                reason=reason,
+                created_by=self.admin,
+            ))
+
+        Wallet.objects.filter(user_id__in=user_ids).update(
+            updated_at=now(),
+            **{
+                field: Case(*whens, default=F(field), output_field=DecimalField(max_digits=12, decimal_places=2))
+                for field, whens in changes.items()
+            },
+        )
+        if BalanceAdjustment.BALANCE in changes:
+            Wallet.retier([user_id for user_id, field, _, _ in adjustments if field == BalanceAdjustment.BALANCE])
+        clear_cached_users(user_ids)
+        return BalanceAdjustment.objects.bulk_create(entries)
+
+    def bulk_adjust(self, rows):
+        """
+        Validate an iterable of dicts with the user, `field` (balance, commission
+        or salary), `value` and `reason`, then apply the valid rows in one transaction.
+        The user is given by `user_id` or `username`, or by `user`, which may be either.
+
+        Rows are validated as they are read, looking users up one chunk at a time.
+        Returns a list of (row_number, user, field, error) tuples, where error is None for applied rows.
+        """
+        report = []
+        valid = []
+        seen = set()
+        chunk = []
+        for row_number, row in enumerate(rows, start=1):
+            chunk.append((row_number, row))
+            if len(chunk) >= ADJUSTMENT_CHUNK_SIZE:
+                self._validate_chunk(chunk, seen, valid, report)
+                chunk = []
+        if chunk:
+            self._validate_chunk(chunk, seen, valid, report)
+
+        self.adjust([adjustment for _, _, adjustment in valid])
+        report.extend((row_number, user, adjustment[1], None) for row_number, user, adjustment in valid)
+        return sorted(report, key=lambda result: result[0])
+
+    def _get_row_user(self, row):
+        """
+        Return the (user_id, username, user) identifiers of a row. The `user_id` and `username`
+        columns name the user explicitly; `user` may be either.
+        """
+        user_id, username = (row.get('user_id') or '').strip(), (row.get('username') or '').strip()
+        if user_id or username:
+            return user_id, username, user_id or username
+        user = (row.get('user') or '').strip()
+        return user, user, user
+
+    def _resolve_user(self, user_id, username, by_id, by_username):
+        """
+        Return (user id, error) for a row's identifiers, looked up by id and by username separately.
+        An identifier matching one user's id and another user's username is rejected as ambiguous.
+        """
+        id_match = by_id.get(int(user_id)) if user_id.isdigit() else None
+        username_match = by_username.get(username) if username else None
+        if id_match is not None and username_match is not None and id_match != username_match:
+            return None, "Ambiguous user: matches one user's id and another's username. Use the user_id or username column."
+        match = id_match if id_match is not None else username_match
+        return match, None if match is not None else "Unknown user."
+
+    def _validate_chunk(self, chunk, seen, valid, report):
+        identifiers = [self._get_row_user(row) for _, row in chunk]
+        ids = {int(user_id) for user_id, _, _ in identifiers if user_id.isdigit()}
+        usernames = {username for _, username, _ in identifiers if username}
+        by_id, by_username = {}, {}
+        for user_id, username in User.objects.filter(Q(pk__in=ids) | Q(username__in=usernames)).values_list('pk', 'username'):
+            by_id[user_id] = user_id
+            by_username[username] = user_id
+
+        fields = dict(BalanceAdjustment.FIELD_CHOICES)
+        for (row_number, row), (user_id, username, user) in zip(chunk, identifiers):
+            field = (row.get('field') or '').strip().lower()
+            reason = (row.get('reason') or '').strip()
+            try:
+                value = Decimal((row.get('value') or '').strip())
+            except InvalidOperation:
+                value = None
+            user_id, error = self._resolve_user(user_id, username, by_id, by_username)
+
+            if error is None:
+                if field not in fields:
+                    error = f"Invalid field. Allowed: {', '.join(fields)}"
+                elif value is None or not value.is_finite():
+                    error = "The value must be a number."
+                elif abs(value) > MAX_WALLET_VALUE:
+                    error = "The value is too large."
+                elif value != value.quantize(Decimal("0.01")):
+                    error = "The value can have at most 2 decimal places."
+                elif not reason:
+                    error = "A reason is required."
+                elif (user_id, field) in seen:
+                    error = "This user's field is already set by an earlier row."
+                else:
+                    seen.add((user_id, field))
+                    valid.append((row_number, user, (user_id, field, value, reason)))
+                    continue
+            report.append((row_number, user, field, error))
@@ -13,8 +13,9 @@ User = get_user_model()
 def create_user_wallet(sender, instance, created, **kwargs):
     """
     Signal to create a wallet for every new user with a signup bonus.
+    Users registered through `SignupService` get their wallet from the service instead.
     """
-    if created:
+    if created and not getattr(instance, '_created_by_signup', False):
         signup_bonus = 0.00
         try:
             settings = get_settings()